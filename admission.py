@@ -0,0 +1,109 @@
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from metrics import metrics
+
+
+class Overloaded(RuntimeError):
+    """Raised when a request is shed instead of queued; `reason` is "queue_full" or "deadline"."""
+
+    def __init__(self, reason, message):
+        super().__init__(message)
+        self.reason = reason
+
+
+class AdmissionController:
+    """
+    Bounds how much generation work is in flight and how much is waiting for it.
+
+    At most `max_concurrent` requests run at once and at most `max_queue` wait for a
+    slot. A request that arrives when the queue is full is shed immediately. A request
+    that cannot get a slot and finish within its deadline is shed when the deadline
+    passes. A shed request that had already started keeps its slot until it finishes,
+    so the bound holds for the real work and its result can still be cached.
+    """
+
+    def __init__(self, max_concurrent=16, max_queue=32, deadline_seconds=10.0, name="generation"):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.deadline_seconds = deadline_seconds
+        self.name = name
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._waiting = 0
+        self._admitted = 0
+        self._shed = {"queue_full": 0, "deadline": 0}
+
+    def _shed_request(self, reason, message):
+        with self._condition:
+            self._shed[reason] += 1
+        metrics.increment(f"{self.name}_shed_{reason}")
+        return Overloaded(reason, message)
+
+    def acquire(self, deadline_seconds=None):
+        """
+        Wait for a slot for up to `deadline_seconds` (default: the controller's deadline)
+        and return the seconds left of the deadline. Raises Overloaded when shed. A caller
+        that has already used up its deadline elsewhere (deadline_seconds <= 0) is shed at once.
+        """
+        deadline_seconds = self.deadline_seconds if deadline_seconds is None else deadline_seconds
+        started = time.monotonic()
+        with self._condition:
+            if deadline_seconds is not None and deadline_seconds <= 0:
+                outcome = "deadline"
+            elif self._in_flight >= self.max_concurrent and self._waiting >= self.max_queue:
+                outcome = "queue_full"
+            else:
+                self._waiting += 1
+                try:
+                    admitted = self._condition.wait_for(
+                        lambda: self._in_flight < self.max_concurrent, timeout=deadline_seconds
+                    )
+                finally:
+                    self._waiting -= 1
+                outcome = "admitted" if admitted else "deadline"
+                if admitted:
+                    self._in_flight += 1
+                    self._admitted += 1
+
+        if outcome == "queue_full":
+            raise self._shed_request(outcome, f"{self.name} queue is full ({self.max_queue} waiting)")
+        waited = time.monotonic() - started
+        metrics.record(f"{self.name}_queue_wait", waited)
+        if outcome == "deadline":
+            raise self._shed_request(outcome, f"No {self.name} slot within {deadline_seconds} seconds")
+        return None if deadline_seconds is None else max(0.0, deadline_seconds - waited)
+
+    def release(self):
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify()
+
+    def run(self, submit, deadline_seconds=None):
+        """
+        Admit one request, start it with `submit()` (which returns a Future) and wait for
+        its result within the deadline. Raises Overloaded when the request is shed.
+        """
+        remaining = self.acquire(deadline_seconds)
+        try:
+            future = submit()
+        except BaseException:
+            self.release()
+            raise
+        future.add_done_callback(lambda _: self.release())
+        try:
+            return future.result(timeout=remaining)
+        except FutureTimeoutError:
+            raise self._shed_request("deadline", f"{self.name} did not finish within the deadline") from None
+
+    def stats(self):
+        with self._condition:
+            return {
+                "in_flight": self._in_flight,
+                "waiting": self._waiting,
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+                "admitted": self._admitted,
+                "shed_queue_full": self._shed["queue_full"],
+                "shed_deadline": self._shed["deadline"],
+            }
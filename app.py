@@ -1,10 +1,26 @@
 from dotenv import load_dotenv
+import atexit
 import os
-from dotenv import load_dotenv
+import threading
 import azure.cognitiveservices.speech as speech_sdk
-from transformers import pipeline
-from translation import translate_text  # Import the translation function from translation.py
-from datetime import datetime  # Import datetime for real-time greetings
+from generation import start_worker_pool
+from model_registry import qa_registry
+from translation import VOICES
+from localization import GOODBYE, GOODBYE_SPOKEN, start_prewarm
+from session import (
+    ChatSession, faq_index, get_faq_response, get_real_time_greeting, lookup_faq, stream_model_response,
+)
+from continuous_recognition import ContinuousRecognizer, FAQPrefetcher
+from metrics import metrics
+from speech_pool import SynthesizerPool
+from streaming import ProgressivePrinter, speak_streaming
+
+# get_faq_response and get_real_time_greeting moved to session.py; they are re-exported
+# here so existing `from app import ...` callers keep working
+__all__ = [
+    "chatbot_interaction", "get_faq_response", "get_real_time_greeting", "initialize_speech_services",
+    "load_environment_variables", "recognize_speech",
+]
 
 def load_environment_variables():
     """Load environment variables from .env file."""
@@ -15,65 +31,13 @@ def load_environment_variables():
     }
 
 def initialize_speech_services(config):
-    """Initialize speech recognizer and synthesizer."""
+    """Initialize speech recognizer and the per-voice synthesizer pool."""
     speech_config = speech_sdk.SpeechConfig(subscription=config['speech_key'], region=config['speech_region'])
-    synthesizer = speech_sdk.SpeechSynthesizer(speech_config=speech_config)
+    synthesizer_pool = SynthesizerPool.from_speech_config(speech_config)
     recognizer = speech_sdk.SpeechRecognizer(speech_config=speech_config)
-    return recognizer, synthesizer, speech_config
-
-# Initialize Hugging Face model
-qa_pipeline = pipeline("text2text-generation", model="google/flan-t5-base")
-
-def get_faq_response(question):
-    """
-    Generate a response to the question using predefined FAQs or Hugging Face model.
-    """
-    faq_database = {
-        "what is your return policy": "Our return policy allows returns within 30 days of purchase.",
-        "how can i track my order": "You can track your order through the 'My Orders' section on our website.",
-        "what payment methods do you accept": "We accept credit/debit cards, PayPal, and other online payment options.",
-        "do you offer international shipping": "Yes, we offer international shipping to select countries.",
-        "how do i cancel my order": "To cancel your order, go to 'My Orders' and select 'Cancel Order'.",
-        "how long does shipping take": "Shipping typically takes 5-7 business days.",
-        "can i change my order after placing it": "You can change your order within one hour of placing it.",
-        "do you have a loyalty program": "Yes, we have a loyalty program that rewards you for every purchase.",
-        "how do i contact customer service": "You can contact customer service via email or phone.",
-        "what should i do if i receive a damaged item": "Please contact us immediately for a replacement or refund.",
-        "is there a warranty on products": "Yes, most products come with a one-year warranty.",
-        "how can i leave feedback about my experience": "You can leave feedback through our website's feedback form.",
-        "do you offer gift cards": "Yes, we offer gift cards that can be purchased online.",
-        "can i pick up my order in-store": "Yes, in-store pickup is available for select items.",
-        "what if i forgot my password": "You can reset your password using the 'Forgot Password' link on the login page.",
-        "are there any discounts available right now": "Check our website for current promotions and discounts.",
-        "how can i update my address": "You can update your address through the 'My Account' section of our website.",
-        "what should i do if i didn’t receive my order": "If your order hasn’t arrived, please contact customer service for assistance.",
-        "how do i report a problem with my order": "Please contact customer service to report any issues with your order.",
-        "can i speak to a customer care agent": "Yes, you can contact our customer care team via phone, email, or live chat.",
-        "hello": "Hi there! How can I assist you today?",
-        "good morning": "Good morning! I hope you have a wonderful day ahead. How can I help you?",
-        "good evening": "Good evening! How was your day? Let me know how I can assist you.",
-        "how are you": "I'm just a program, but I'm here and ready to help you!",
-        "what's your name": "I'm your friendly AI assistant, here to make your life easier.",
-        "what can you do": "I can answer your questions, translate languages, and assist you with various tasks.",
-        "thank you": "You're welcome! Let me know if there's anything else I can help with.",
-        "who are you": "I am an AI chatbot designed to assist you with your queries and provide support.",
-        "tell me a joke": "Why don’t skeletons fight each other? Because they don’t have the guts!",
-        "how is the weather": "I'm not sure, but you can check the weather app for accurate updates."
-    }
-
-    normalized_question = question.lower().strip()
-    response = faq_database.get(normalized_question)
-
-    if response:
-        return response
-
-    try:
-        response = qa_pipeline(question, max_length=150, do_sample=False)
-        return response[0]['generated_text']
-    except Exception as e:
-        print(f"Error with Hugging Face model: {e}")
-        return None
+    return recognizer, synthesizer_pool, speech_config
 
+@metrics.timed("recognition")
 def recognize_speech(recognizer):
     """Recognize speech input and handle errors."""
     print("Listening... (Say 'quit' to exit chatbot)")
@@ -87,129 +51,132 @@ def recognize_speech(recognizer):
         print(f"Speech recognition error: {result.reason}")
         return None
 
-def get_real_time_greeting():
-    """Get a greeting based on the current time."""
-    current_hour = datetime.now().hour
-    if 5 <= current_hour < 12:
-        return "Good morning! How can I assist you?"
-    elif 12 <= current_hour < 18:
-        return "Good afternoon! How can I assist you?"
-    else:
-        return "Good evening! How can I assist you?"
-
 def chatbot_interaction(config):
     """Main interaction loop for the chatbot."""
-    recognizer, synthesizer, speech_config = initialize_speech_services(config)
-
-    voices = {
-        "en": ("en-US-AriaNeural", "English"),
-        "hi": ("hi-IN-MadhurNeural", "Hindi"),
-        "mr": ("mr-IN-AarohiNeural", "Marathi"),
-        "fr": ("fr-FR-HenriNeural", "French"),
-        "es": ("es-ES-ElviraNeural", "Spanish"),
-        "ja": ("ja-JP-NanamiNeural", "Japanese"),
-        "ko": ("ko-KR-SunHiNeural", "Korean")
-    }
+    # With QA_WORKERS set, generation moves to worker processes forked before any other threads start.
+    # Otherwise load the model in the background so FAQ and greeting replies are served immediately.
+    if start_worker_pool() is None:
+        qa_registry.start_background_load()
+    # Pre-translate fixed replies and localize the FAQ so most localized replies skip the network
+    start_prewarm(faq_index=faq_index)
+    recognizer, synthesizer_pool, speech_config = initialize_speech_services(config)
+
+    voices = VOICES
 
     print("Welcome to the Customer Care Chatbot!")
     print("You can either speak or type your question. Type or say 'quit' to exit.")
+    print("Say or type 'help', 'switch to Hindi', 'volume 60' or 'louder' at any time.")
 
-    preferred_language = "en"  # Default language is English
-    speech_config.speech_synthesis_voice_name = voices[preferred_language][0]
-    volume = 75  # Default volume level
+    session = ChatSession()  # Default language is English, default volume is 75
+    prefetcher = FAQPrefetcher(faq_index, fallback=lookup_faq)
+    listener = None
 
-    mode = None
     while True:
-        if not mode:
-            mode = input("Would you like to speak or write your question? (Type 'speak' or 'write'): ").strip().lower()
+        if not session.mode:
+            session.mode = input("Would you like to speak or write your question? (Type 'speak' or 'write'): ").strip().lower()
 
-            if mode == "quit":
+            if session.mode == "quit":
                 print("Chatbot: Goodbye!")
-                synthesizer.speak_text_async("Thank you! Have a nice day!").get()
+                synthesizer_pool.speak(GOODBYE, voices["en"][0], session.volume)
                 break
 
-            if mode == "speak":
+            if session.mode == "speak":
                 print("Available languages: en (English), hi (Hindi), mr (Marathi), fr (French), es (Spanish)")
                 language_input = input("Select your preferred language code for responses: ").strip().lower()
-                if language_input in voices:
-                    preferred_language = language_input
-                    language_name = voices[language_input][1]
-                    print(f"Language set to {language_name} ({language_input})")
-                    synthesizer.speak_text_async(f"Language set to {language_name}.").get()
-                    speech_config.speech_synthesis_voice_name = voices[preferred_language][0]
+                if session.set_language(language_input):
+                    print(f"Language set to {session.language_name} ({language_input})")
+                    synthesizer_pool.speak(f"Language set to {session.language_name}.", voices["en"][0], session.volume)
                 else:
                     print("Invalid language code. Defaulting to English.")
-                    preferred_language = "en"
 
-            if mode not in ["speak", "write"]:
+            if session.mode not in ["speak", "write"]:
                 print("Invalid choice. Please type 'speak' or 'write'.")
-                mode = None
+                session.mode = None
                 continue
 
-        # Volume adjustment option
-        adjust_volume = input("Would you like to adjust the volume? (Type 'yes' to adjust, 'no' to continue): ").strip().lower()
-        if adjust_volume == "yes":
-            try:
-                volume = int(input("Set the volume level (0-100, default is 75): ").strip())
-                volume = max(0, min(100, volume))  # Ensure volume is within valid range
-                speech_config.speech_synthesis_volume = volume
-                print(f"Volume set to {volume}.")
-            except ValueError:
-                print("Invalid input. Volume remains unchanged.")
-
-        if mode == "speak":
-            user_text = recognize_speech(recognizer)
+        if session.mode == "speak":
+            if listener is None:
+                # One continuous recognition session for the whole conversation; partial
+                # hypotheses start the FAQ lookup before the customer finishes speaking
+                listener = ContinuousRecognizer(
+                    recognizer, on_partial=lambda text: prefetcher.prefetch(text, session.preferred_language)
+                )
+                listener.start()
+            if listener.running:
+                print("Listening... (Say 'quit' to exit chatbot)")
+                user_text = listener.get()
+                listener.pause()  # Ignore the chatbot's own voice while it replies
+            else:
+                user_text = recognize_speech(recognizer)
             if user_text is None:
                 continue
-            if user_text.lower() == "quit":
+            # Control utterances (quit, greetings, language, volume, help) skip the FAQ and the model
+            reply = session.control_reply(user_text)
+            if reply is not None and reply["kind"] == "quit":
+                listener.stop()
                 print("Exiting chatbot. Goodbye!")
-                synthesizer.speak_text_async("Goodbye! Thank you for using the chatbot.").get()
+                synthesizer_pool.speak(GOODBYE_SPOKEN, voices["en"][0], session.volume)
                 exit()
             print(f"You said: {user_text}")
 
-        elif mode == "write":
+        elif session.mode == "write":
             user_text = input("You: ").strip(".!?\n ")
-            if user_text.lower() == "quit":
+            reply = session.control_reply(user_text)
+            if reply is not None and reply["kind"] == "quit":
                 print("Chatbot: Goodbye!")
-                synthesizer.speak_text_async("Thank you! Have a nice day!").get()
+                synthesizer_pool.speak(GOODBYE, voices["en"][0], session.volume)
                 break
             print(f"You wrote: {user_text}")
 
-        # Check for greetings and respond with real-time greeting
-        if user_text.lower() in ["good morning", "good afternoon", "good evening", "hello", "hi"]:
-            greeting_response = get_real_time_greeting()
-
-            if preferred_language != "en":
-                greeting_response = translate_text(greeting_response, preferred_language)
-
-            print(f"Chatbot: {greeting_response}")
-            localized_synthesizer = speech_sdk.SpeechSynthesizer(speech_config=speech_config)
-            localized_synthesizer.speak_text_async(greeting_response).get()
+        if reply is not None:
+            reply = session.localize_reply(reply)
+            print(f"Chatbot: {reply['text']}")
+            synthesizer_pool.speak(reply["text"], voices[reply["language"]][0], session.volume)
             continue
 
-        # Get FAQ response
-        response = get_faq_response(user_text)
-
-        if not response:
-            if mode == "speak":
-                response = "That question seems incorrect. Please try rephrasing it."
-                print(f"Chatbot: {response}")
-                synthesizer.speak_text_async(response).get()
-            elif mode == "write":
-                response = "That question seems incorrect. Please correct it and try again."
-                print(f"Chatbot: {response}")
+        # FAQ hits come back already in the customer's language: no model or translation call
+        # In speak mode the FAQ was usually searched already, on the last partial hypothesis
+        reply = session.faq_reply(user_text, prefetcher.lookup)
+        if reply is not None:
+            reply = session.localize_reply(reply)  # Only translates if this answer is not localized yet
+            print(f"Chatbot Response ({session.language_name}): {reply['text']}")
+            synthesizer_pool.speak(reply["text"], voices[reply["language"]][0], session.volume)
             continue
 
-        if preferred_language != "en":
-            response = translate_text(response, preferred_language)
+        # Stream the model's answer token by token.
+        # Sentences are translated and spoken while the rest is still being generated.
+        printer = ProgressivePrinter(f"Chatbot Response ({session.language_name}): ")
+        cancel_event = threading.Event()
+        chunks = stream_model_response(user_text, cancel_event)  # The FAQ already missed above
+        try:
+            if session.mode == "write" and session.preferred_language == "en":
+                response = speak_streaming(printer.echo(chunks), "en", synthesizer_pool, session.volume)
+            else:
+                response = speak_streaming(
+                    chunks, session.preferred_language, synthesizer_pool, session.volume,
+                    on_sentence=lambda sentence: printer(sentence + " "),
+                )
+        except KeyboardInterrupt:
+            cancel_event.set()  # Stop generating an answer nobody will read
+            printer.finish()
+            print("Response interrupted.")
+            continue
+        printer.finish()
 
-        localized_synthesizer = speech_sdk.SpeechSynthesizer(speech_config=speech_config)
-        localized_synthesizer.speak_text_async(response).get()
-        print(f"Chatbot Response ({voices[preferred_language][1]}): {response}")
+        if not response:
+            response = session.fallback_reply()
+            print(f"Chatbot: {response}")
+            if session.mode == "speak":
+                synthesizer_pool.speak(response, voices["en"][0], session.volume)
 
+    if listener is not None:
+        listener.stop()
     print("Chatbot session ended.")
 
 
-if __name__ == "_main_":
+if __name__ == "__main__":
     config = load_environment_variables()
+    if os.getenv("METRICS_FILE"):
+        # Saved on any exit, including 'quit' in speak mode
+        atexit.register(metrics.write, os.getenv("METRICS_FILE"))
     chatbot_interaction(config)
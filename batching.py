@@ -0,0 +1,122 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class MicroBatchScheduler:
+    """
+    Groups concurrent requests into batches for a single batched call.
+
+    Callers `submit()` one input and get a Future back. A worker thread waits for the
+    first queued input, keeps collecting until `max_batch_size` inputs are queued or
+    `max_wait_ms` has passed, then hands the whole batch to `run_batch`, which must
+    return one output per input in the same order.
+    """
+
+    def __init__(self, run_batch, max_batch_size=8, max_wait_ms=10, name="micro-batcher"):
+        self.run_batch = run_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0, max_wait_ms) / 1000
+        self.name = name
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+        self._requests = 0
+        self._batches = 0
+        self._largest_batch = 0
+        self._busy_seconds = 0.0
+        self._started_at = None
+
+    def submit(self, item):
+        """Queue an input and return a Future that resolves to its output."""
+        if self._closed:
+            raise RuntimeError(f"{self.name} is closed")
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def __call__(self, item, timeout=None):
+        """Submit an input and block until its output is ready."""
+        return self.submit(item).result(timeout)
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._thread is None:
+                self._started_at = time.perf_counter()
+                self._thread = threading.Thread(target=self._worker, name=self.name, daemon=True)
+                self._thread.start()
+
+    def _collect_batch(self):
+        """Block for the first input, then gather more until the batch is full or the window closes."""
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                entry = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is None:
+                # Finish the current batch before shutting down
+                self._queue.put(None)
+                break
+            batch.append(entry)
+        return batch
+
+    def _worker(self):
+        while True:
+            batch = self._collect_batch()
+            if batch is None:
+                return
+
+            # Skip inputs whose callers already gave up
+            batch = [(item, future) for item, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            started = time.perf_counter()
+            try:
+                outputs = self.run_batch([item for item, _ in batch])
+                if len(outputs) != len(batch):
+                    raise RuntimeError(f"Batch returned {len(outputs)} outputs for {len(batch)} inputs")
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+            else:
+                for (_, future), output in zip(batch, outputs):
+                    future.set_result(output)
+
+            with self._lock:
+                self._busy_seconds += time.perf_counter() - started
+                self._requests += len(batch)
+                self._batches += 1
+                self._largest_batch = max(self._largest_batch, len(batch))
+
+    def stats(self):
+        """Return throughput and queue-depth counters."""
+        with self._lock:
+            elapsed = time.perf_counter() - self._started_at if self._started_at else 0.0
+            return {
+                "requests": self._requests,
+                "batches": self._batches,
+                "average_batch_size": self._requests / self._batches if self._batches else 0.0,
+                "largest_batch": self._largest_batch,
+                "queue_depth": self._queue.qsize(),
+                "busy_seconds": self._busy_seconds,
+                "throughput_per_second": self._requests / elapsed if elapsed else 0.0,
+            }
+
+    def close(self):
+        """Stop the worker after the inputs already queued have been processed."""
+        with self._lock:
+            self._closed = True
+            thread = self._thread
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
@@ -0,0 +1,132 @@
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+
+
+class StubTranslator:
+    """Offline stand-in for googletrans.Translator that tags text with the target language."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+
+    def translate(self, text, dest="en"):
+        time.sleep(self.latency)
+        return SimpleNamespace(text=f"[{dest}] {text}", dest=dest)
+
+
+def stub_generate_batch(latency):
+    """Build a run_batch function for the QA scheduler that answers without a model."""
+    def generate_batch(questions):
+        time.sleep(latency)
+        return [f"Stub answer to: {question}" for question in questions]
+    return generate_batch
+
+
+def run_customer(session, questions, synthesizer_pool, word_delay):
+    """Replay one customer's questions through recognition, the turn logic and synthesis."""
+    from continuous_recognition import ContinuousRecognizer, FakeRecognizer
+
+    listener = ContinuousRecognizer(FakeRecognizer(questions, word_delay=word_delay))
+    listener.start()
+    turns = 0
+    for user_text in listener:
+        reply = session.respond(user_text)
+        if reply["text"]:
+            synthesizer_pool.synthesize(reply["text"], session.voice, session.volume)
+        turns += 1
+    listener.stop()
+    return turns
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Replay FAQ questions through the chatbot turn logic with local speech and "
+                    "translation stubs, and report per-stage latency percentiles and throughput.",
+    )
+    parser.add_argument("--questions", help="FAQ file whose questions are replayed (default: Question_sample.txt)")
+    parser.add_argument("--customers", type=int, default=4, help="Concurrent simulated customers")
+    parser.add_argument("--repeats", type=int, default=3, help="Times each customer replays the questions")
+    parser.add_argument("--languages", default="en,hi,fr,es", help="Reply languages, assigned to customers in turn")
+    parser.add_argument("--skip-faq", action="store_true", help="Send every question to the model instead of the FAQ index")
+    parser.add_argument("--stub-model", action="store_true", help="Answer with a stub instead of loading the QA model")
+    parser.add_argument("--model-latency-ms", type=float, default=50, help="Latency of one stub model batch")
+    parser.add_argument("--translation-latency-ms", type=float, default=20, help="Latency of one stub translation")
+    parser.add_argument("--synthesis-latency-ms", type=float, default=30, help="Latency of one stub synthesis")
+    parser.add_argument("--word-delay-ms", type=float, default=0, help="Delay between recognized words")
+    parser.add_argument("--cache-dir", help="Cache directory to use (default: a fresh temporary directory)")
+    parser.add_argument("--output", help="Write the results to this file (.prom for Prometheus text, else JSON)")
+    args = parser.parse_args()
+
+    # Point the caches somewhere disposable before the chatbot modules create them
+    os.environ["CHATBOT_CACHE_DIR"] = args.cache_dir or tempfile.mkdtemp(prefix="chatbot-benchmark-")
+
+    import session as session_module
+    import translation
+    from faq_index import DEFAULT_FAQ_FILE, MultilingualFAQIndex, load_faq_entries
+    from generation import qa_scheduler
+    from metrics import metrics
+    from speech_pool import FakeSynthesizer, SynthesizerPool
+    from translation_backends import GoogleTransBackend
+
+    translation._translation_backend = GoogleTransBackend(StubTranslator(args.translation_latency_ms / 1000))
+    if args.stub_model:
+        qa_scheduler.run_batch = stub_generate_batch(args.model_latency_ms / 1000)
+    if args.skip_faq:
+        session_module.faq_index = MultilingualFAQIndex([])
+    synthesizer_pool = SynthesizerPool(
+        lambda voice: FakeSynthesizer(voice, latency=args.synthesis_latency_ms / 1000)
+    )
+
+    questions = [question for question, _ in load_faq_entries(args.questions or DEFAULT_FAQ_FILE)]
+    languages = [code.strip() for code in args.languages.split(",") if code.strip()]
+    sessions = [
+        session_module.ChatSession(mode="speak", preferred_language=languages[i % len(languages)])
+        for i in range(args.customers)
+    ]
+    turn_counts = [0] * len(sessions)
+
+    def customer(i):
+        turn_counts[i] = run_customer(sessions[i], questions * args.repeats, synthesizer_pool, args.word_delay_ms / 1000)
+
+    metrics.reset()
+    started = time.perf_counter()
+    threads = [threading.Thread(target=customer, args=(i,)) for i in range(len(sessions))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    qa_scheduler.close()
+
+    summary = metrics.summary()
+    turns = sum(turn_counts)
+    summary["throughput"] = {
+        "turns": turns,
+        "seconds": elapsed,
+        "turns_per_second": turns / elapsed if elapsed else 0.0,
+    }
+
+    print(f"\n{'stage':<24}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for stage, stats in sorted(summary["stages"].items()):
+        print(
+            f"{stage:<24}{stats['count']:>8}{stats['p50_seconds'] * 1000:>10.2f}"
+            f"{stats['p95_seconds'] * 1000:>10.2f}{stats['p99_seconds'] * 1000:>10.2f}{stats['errors']:>8}"
+        )
+    for counter, value in sorted(summary["counters"].items()):
+        print(f"{counter}: {value}")
+    print(f"\n{turns} turns in {elapsed:.2f}s ({summary['throughput']['turns_per_second']:.1f} turns/s)")
+
+    if args.output:
+        if args.output.endswith(".prom"):
+            metrics.write(args.output)
+        else:
+            with open(args.output, "w", encoding="utf-8") as output_file:
+                json.dump(summary, output_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+import argparse
+import ast
+import itertools
+import json
+import os
+import time
+
+
+def detect_format(path):
+    """Guess the input format: "jsonl", "faq" (the Question_sample.txt format) or "text"."""
+    if path.lower().endswith(".jsonl"):
+        return "jsonl"
+    with open(path, encoding="utf-8") as input_file:
+        for line in input_file:
+            line = line.strip()
+            if line:
+                return "faq" if line.startswith('"') and '":' in line else "text"
+    return "text"
+
+
+def read_questions(path, input_format="auto"):
+    """
+    Yield (record_id, question) pairs one line at a time, so the file never has to fit in
+    memory. Text files hold one question per line. JSONL lines hold a string or an object
+    with "question" and an optional "id". FAQ files hold `"question": "answer",` lines.
+    Records without an id are numbered by line.
+    """
+    if input_format == "auto":
+        input_format = detect_format(path)
+    with open(path, encoding="utf-8") as input_file:
+        for line_number, line in enumerate(input_file, 1):
+            line = line.strip()
+            if not line:
+                continue
+            record_id = line_number
+            try:
+                if input_format == "jsonl":
+                    record = json.loads(line)
+                    if isinstance(record, dict):
+                        record_id = record.get("id", line_number)
+                        record = record.get("question")
+                    question = record
+                elif input_format == "faq":
+                    question = next(iter(ast.literal_eval("{" + line.rstrip(",") + "}")))
+                else:
+                    question = line
+            except (ValueError, SyntaxError, StopIteration) as e:
+                print(f"Skipping line {line_number}: {e}")
+                continue
+            if isinstance(question, str) and question.strip():
+                yield record_id, question.strip()
+
+
+def load_checkpoint(path):
+    try:
+        with open(path, encoding="utf-8") as checkpoint_file:
+            return json.load(checkpoint_file)
+    except FileNotFoundError:
+        return None
+
+
+def save_checkpoint(path, checkpoint):
+    """Replace the checkpoint atomically, so a crash never leaves a half-written one."""
+    temporary_path = path + ".tmp"
+    with open(temporary_path, "w", encoding="utf-8") as checkpoint_file:
+        json.dump(checkpoint, checkpoint_file)
+        checkpoint_file.flush()
+        os.fsync(checkpoint_file.fileno())
+    os.replace(temporary_path, path)
+
+
+def answer_chunk(records, languages):
+    """Answer one chunk: FAQ lookups first, then every miss is queued for batched generation."""
+    from generation import submit_answer
+    from session import lookup_faq
+    from translation import translate_batch
+
+    results = []
+    pending = []
+    for record_id, question in records:
+        result = {"id": record_id, "question": question}
+        faq_answer = lookup_faq(question)
+        if faq_answer is not None:
+            result.update(source="faq", answer=faq_answer[0])
+        else:
+            pending.append((result, submit_answer(question)))
+        results.append(result)
+
+    for result, future in pending:
+        try:
+            answer = future.result()
+        except Exception as e:
+            result.update(source="error", answer=None, error=str(e))
+        else:
+            result.update(source="model", answer=answer)
+
+    if languages:
+        answered = [result for result in results if result["answer"]]
+        # A failed translation is written as null, never as the English answer
+        translations = translate_batch([result["answer"] for result in answered], languages, fallback_to_source=False)
+        for position, result in enumerate(answered):
+            result["translations"] = {language: translations[language][position] for language in languages}
+            failed = [language for language in languages if result["translations"][language] is None]
+            if failed:
+                result["translation_error"] = f"Translation failed for: {', '.join(failed)}"
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Answer a file of questions offline: FAQ lookup, batched generation and optional "
+                    "translation, written as JSONL with resumable checkpoints.",
+    )
+    parser.add_argument("input", help="Questions as text (one per line), JSONL, or the Question_sample.txt format")
+    parser.add_argument("output", help="JSONL file to write, one answer per line")
+    parser.add_argument("--format", default="auto", choices=["auto", "text", "jsonl", "faq"])
+    parser.add_argument("--languages", default="", help="Comma-separated languages to translate the answers into")
+    parser.add_argument("--chunk-size", type=int, default=256, help="Questions answered and written per checkpoint")
+    parser.add_argument("--workers", type=int, default=None, help="Generation worker processes (default: QA_WORKERS)")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: OUTPUT.checkpoint)")
+    parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint and start over")
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    from generation import start_worker_pool
+    from model_registry import qa_registry
+
+    if start_worker_pool(args.workers) is None:
+        qa_registry.start_background_load()
+
+    languages = [code.strip() for code in args.languages.split(",") if code.strip()]
+    checkpoint_path = args.checkpoint or args.output + ".checkpoint"
+    checkpoint = None if args.restart else load_checkpoint(checkpoint_path)
+    if checkpoint is not None and checkpoint.get("input") != os.path.abspath(args.input):
+        raise SystemExit(f"{checkpoint_path} belongs to {checkpoint.get('input')}; use --restart to start over")
+    if checkpoint is not None and not os.path.exists(args.output):
+        raise SystemExit(f"{args.output} is missing; use --restart to start over")
+    done = checkpoint["records"] if checkpoint else 0
+
+    # Drop anything written after the last checkpoint, then append from there
+    output_file = open(args.output, "r+b" if checkpoint else "wb")
+    output_file.truncate(checkpoint["output_bytes"] if checkpoint else 0)
+    output_file.seek(0, os.SEEK_END)
+    if done:
+        print(f"Resuming after {done} questions")
+
+    records = itertools.islice(read_questions(args.input, args.format), done, None)
+    started = time.perf_counter()
+    answered = 0
+    with output_file:
+        while True:
+            chunk = list(itertools.islice(records, args.chunk_size))
+            if not chunk:
+                break
+            for result in answer_chunk(chunk, languages):
+                output_file.write((json.dumps(result, ensure_ascii=False) + "\n").encode("utf-8"))
+            output_file.flush()
+            os.fsync(output_file.fileno())
+
+            done += len(chunk)
+            answered += len(chunk)
+            save_checkpoint(checkpoint_path, {
+                "input": os.path.abspath(args.input),
+                "records": done,
+                "output_bytes": output_file.tell(),
+            })
+            elapsed = time.perf_counter() - started
+            print(f"{done} questions answered ({answered / elapsed:.1f}/s)")
+
+    print(f"Finished: {done} questions written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+CACHE_DIR = os.getenv("CHATBOT_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".chatbot_cache"))
+
+
+def make_cache_key(*parts):
+    """Build a stable cache key from JSON-serializable parts."""
+    encoded = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class PersistentCache:
+    """
+    In-memory LRU cache with optional TTL, backed by a SQLite file.
+
+    Entries are looked up in memory first, then on disk, so they survive restarts.
+    The memory tier holds at most `max_entries` items; the disk tier is pruned back to
+    `max_disk_entries` by least recent use. Values must be JSON-serializable.
+    """
+
+    PRUNE_EVERY = 100
+
+    def __init__(self, path=None, max_entries=10000, max_disk_entries=100000, ttl_seconds=None):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl_seconds = ttl_seconds
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._connection = None
+        self._writes_since_prune = 0
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._disk_evictions = 0
+        self._expirations = 0
+
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._connection = sqlite3.connect(path, check_same_thread=False)
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL, accessed_at REAL NOT NULL)"
+            )
+            self._connection.execute("CREATE INDEX IF NOT EXISTS cache_accessed_at ON cache (accessed_at)")
+            self._connection.commit()
+
+    def _expired(self, expires_at, now):
+        return expires_at is not None and expires_at <= now
+
+    def get(self, key, default=None):
+        """Return the cached value for the key, or `default` on a miss."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if not self._expired(expires_at, now):
+                    self._memory.move_to_end(key)
+                    self._hits += 1
+                    return value
+                del self._memory[key]
+                self._expirations += 1
+
+            if self._connection is not None:
+                row = self._connection.execute(
+                    "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    if not self._expired(row[1], now):
+                        value = json.loads(row[0])
+                        self._connection.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+                        self._connection.commit()
+                        self._remember(key, value, row[1])
+                        self._hits += 1
+                        self._disk_hits += 1
+                        return value
+                    self._connection.execute("DELETE FROM cache WHERE key = ?", (key,))
+                    self._connection.commit()
+                    self._expirations += 1
+
+            self._misses += 1
+            return default
+
+    def put(self, key, value):
+        """Store a value in memory and on disk."""
+        now = time.time()
+        expires_at = now + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            self._remember(key, value, expires_at)
+            if self._connection is not None:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value, ensure_ascii=False), expires_at, now),
+                )
+                self._writes_since_prune += 1
+                if self._writes_since_prune >= self.PRUNE_EVERY:
+                    self._prune_disk(now)
+                self._connection.commit()
+
+    def _remember(self, key, value, expires_at):
+        self._memory[key] = (value, expires_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._evictions += 1
+
+    def _prune_disk(self, now):
+        """Drop expired rows, then the least recently used rows above the disk cap."""
+        self._writes_since_prune = 0
+        self._connection.execute("DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+        (count,) = self._connection.execute("SELECT COUNT(*) FROM cache").fetchone()
+        excess = count - self.max_disk_entries
+        if excess > 0:
+            self._connection.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed_at LIMIT ?)", (excess,)
+            )
+            self._disk_evictions += excess
+
+    def stats(self):
+        """Return hit, miss and eviction counters."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "evictions": self._evictions,
+                "disk_evictions": self._disk_evictions,
+                "expirations": self._expirations,
+                "memory_entries": len(self._memory),
+            }
+
+    def clear(self):
+        """Remove every entry from memory and disk."""
+        with self._lock:
+            self._memory.clear()
+            if self._connection is not None:
+                self._connection.execute("DELETE FROM cache")
+                self._connection.commit()
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
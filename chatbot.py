@@ -1,9 +1,24 @@
 from dotenv import load_dotenv
+import atexit
 import os
+import threading
 import azure.cognitiveservices.speech as speech_sdk
-from transformers import pipeline
-from translation import translate_text  # Import the translation function from translation.py
-from datetime import datetime  # Import datetime for real-time greetings
+from generation import generate_answer, start_worker_pool, stream_answer
+from model_registry import qa_registry
+from translation import VOICES
+from localization import GOODBYE, GOODBYE_SPOKEN, start_prewarm
+from session import ChatSession, get_real_time_greeting
+from continuous_recognition import ContinuousRecognizer
+from metrics import metrics
+from speech_pool import SynthesizerPool
+from streaming import ProgressivePrinter, speak_streaming
+
+# get_real_time_greeting moved to session.py; it is re-exported here so existing
+# `from chatbot import get_real_time_greeting` callers keep working
+__all__ = [
+    "chatbot_interaction", "get_faq_response", "get_real_time_greeting", "initialize_speech_services",
+    "load_environment_variables", "recognize_speech", "stream_faq_response",
+]
 
 
 def load_environment_variables():
@@ -16,15 +31,11 @@ def load_environment_variables():
 
 
 def initialize_speech_services(config):
-    """Initialize speech recognizer and synthesizer."""
+    """Initialize speech recognizer and the per-voice synthesizer pool."""
     speech_config = speech_sdk.SpeechConfig(subscription=config['speech_key'], region=config['speech_region'])
     recognizer = speech_sdk.SpeechRecognizer(speech_config=speech_config)
-    synthesizer = speech_sdk.SpeechSynthesizer(speech_config=speech_config)
-    return recognizer, synthesizer
-
-
-# Initialize Hugging Face model
-qa_pipeline = pipeline("text2text-generation", model="google/flan-t5-base")
+    synthesizer_pool = SynthesizerPool.from_speech_config(speech_config)
+    return recognizer, synthesizer_pool
 
 
 def get_faq_response(question):
@@ -32,13 +43,24 @@ def get_faq_response(question):
     Generate a response to the question using Hugging Face model.
     """
     try:
-        response = qa_pipeline(question, max_length=150, do_sample=False)
-        return response[0]['generated_text']
+        return generate_answer(question)
     except Exception as e:
         print(f"Error with Hugging Face model: {e}")
         return None
 
 
+def stream_faq_response(question, cancel_event=None):
+    """
+    Stream a response to the question, yielding the Hugging Face model's answer
+    piece by piece as it is generated.
+    """
+    try:
+        yield from stream_answer(question, cancel_event)
+    except Exception as e:
+        print(f"Error with Hugging Face model: {e}")
+
+
+@metrics.timed("recognition")
 def recognize_speech(recognizer):
     """Recognize speech input and handle errors."""
     print("Listening... (Say 'quit' to exit chatbot)")
@@ -53,128 +75,119 @@ def recognize_speech(recognizer):
         return None
 
 
-def get_real_time_greeting():
-    """Get a greeting based on the current time."""
-    current_hour = datetime.now().hour
-    if 5 <= current_hour < 12:
-        return "Good morning! How can I assist you?"
-    elif 12 <= current_hour < 18:
-        return "Good afternoon! How can I assist you?"
-    else:
-        return "Good evening! How can I assist you?"
-
-
 def chatbot_interaction(config):
     """Main interaction loop for the chatbot."""
-    recognizer, synthesizer = initialize_speech_services(config)
-
-    voices = {
-        "en": ("en-US-AriaNeural", "English"),
-        "hi": ("hi-IN-MadhurNeural", "Hindi"),
-        "mr": ("mr-IN-AarohiNeural",     "Marathi"),
-        "fr": ("fr-FR-HenriNeural", "French"),
-        "es": ("es-ES-ElviraNeural", "Spanish"),
-        "ja": ("ja-JP-NanamiNeural", "Japanese"),
-        "ko": ("ko-KR-SunHiNeural", "Korean")
-    }
+    # With QA_WORKERS set, generation moves to worker processes forked before any other threads start.
+    # Otherwise load the model in the background so FAQ and greeting replies are served immediately.
+    if start_worker_pool() is None:
+        qa_registry.start_background_load()
+    # Pre-translate fixed replies so most localized replies skip the network
+    start_prewarm()
+    recognizer, synthesizer_pool = initialize_speech_services(config)
+
+    voices = VOICES
 
     print("Welcome to the Customer Care Chatbot!")
     print("You can either speak or type your question. Type or say 'quit' to exit.")
+    print("Say or type 'help', 'switch to Hindi', 'volume 60' or 'louder' at any time.")
 
-    preferred_language = "en"  # Default language is English
-
-    mode = None
+    session = ChatSession()  # Default language is English, default volume is 75
+    listener = None
     while True:
-        if not mode:
-            mode = input("Would you like to speak or write your question? (Type 'speak' or 'write'): ").strip().lower()
+        if not session.mode:
+            session.mode = input("Would you like to speak or write your question? (Type 'speak' or 'write'): ").strip().lower()
 
-            if mode == "quit":
+            if session.mode == "quit":
                 print("Chatbot: Goodbye!")
-                synthesizer.speak_text_async("Thank you! Have a nice day!").get()
+                synthesizer_pool.speak(GOODBYE, voices["en"][0], session.volume)
                 break
 
-            if mode == "speak":
+            if session.mode == "speak":
                 # Ask for language selection in speak mode
                 print("Available languages: en (English), hi (Hindi), mr (Marathi), fr (French), es (Spanish)")
                 language_input = input("Select your preferred language code for responses: ").strip().lower()
-                if language_input in voices:
-                    preferred_language = language_input
-                    language_name = voices[language_input][1]
-                    print(f"Language set to {language_name} ({language_input})")
-                    synthesizer.speak_text_async(f"Language set to {language_name}.").get()
+                if session.set_language(language_input):
+                    print(f"Language set to {session.language_name} ({language_input})")
+                    synthesizer_pool.speak(f"Language set to {session.language_name}.", voices["en"][0], session.volume)
                 else:
                     print("Invalid language code. Defaulting to English.")
-                    preferred_language = "en"
 
-            if mode not in ["speak", "write"]:
+            if session.mode not in ["speak", "write"]:
                 print("Invalid choice. Please type 'speak' or 'write'.")
-                mode = None
+                session.mode = None
                 continue
 
-        if mode == "speak":
-            user_text = recognize_speech(recognizer)
+        if session.mode == "speak":
+            if listener is None:
+                # One continuous recognition session for the whole conversation
+                listener = ContinuousRecognizer(recognizer)
+                listener.start()
+            if listener.running:
+                print("Listening... (Say 'quit' to exit chatbot)")
+                user_text = listener.get()
+                listener.pause()  # Ignore the chatbot's own voice while it replies
+            else:
+                user_text = recognize_speech(recognizer)
             if user_text is None:
                 continue
-            if user_text.lower() == "quit":  # Exit the program if "Quit" is spoken
+            # Control utterances (quit, greetings, language, volume, help) skip the model
+            reply = session.control_reply(user_text)
+            if reply is not None and reply["kind"] == "quit":  # Exit the program if "Quit" is spoken
+                listener.stop()
                 print("Exiting chatbot. Goodbye!")
-                synthesizer.speak_text_async("Goodbye! Thank you for using the chatbot.").get()
+                synthesizer_pool.speak(GOODBYE_SPOKEN, voices["en"][0], session.volume)
                 exit()  # Terminate the program immediately
             print(f"You said: {user_text}")
 
-        elif mode == "write":
+        elif session.mode == "write":
             user_text = input("You: ").strip(".!?\n ")
-            if user_text.lower() == "quit":  # Case-insensitive check for 'quit'
+            reply = session.control_reply(user_text)
+            if reply is not None and reply["kind"] == "quit":
                 print("Chatbot: Goodbye!")
-                synthesizer.speak_text_async("Thank you! Have a nice day!").get()
+                synthesizer_pool.speak(GOODBYE, voices["en"][0], session.volume)
                 break
             print(f"You wrote: {user_text}")
 
-        # Check for greetings and respond with real-time greeting
-        if user_text.lower() in ["good morning", "good afternoon", "good evening", "hello", "hi"]:
-            greeting_response = get_real_time_greeting()
-
-            # Translate the greeting to the preferred language if necessary
-            if preferred_language != "en":
-                greeting_response = translate_text(greeting_response, preferred_language)
-
-            print(f"Chatbot: {greeting_response}")
-            speech_config = speech_sdk.SpeechConfig(subscription=config['speech_key'], region=config['speech_region'])
-            speech_config.speech_synthesis_voice_name = voices[preferred_language][0]
-            localized_synthesizer = speech_sdk.SpeechSynthesizer(speech_config=speech_config)
-            localized_synthesizer.speak_text_async(greeting_response).get()
+        if reply is not None:
+            reply = session.localize_reply(reply)
+            print(f"Chatbot: {reply['text']}")
+            synthesizer_pool.speak(reply["text"], voices[reply["language"]][0], session.volume)
             continue
 
-        # Get FAQ response
-        response = get_faq_response(user_text)
-
-        if not response:
-            if mode == "speak":
-                response = "That question seems incorrect. Please try rephrasing it."
-                print(f"Chatbot: {response}")
-                synthesizer.speak_text_async(response).get()
-            elif mode == "write":
-                response = "That question seems incorrect. Please correct it and try again."
-                print(f"Chatbot: {response}")
+        # Stream the answer token by token; sentences are translated and spoken
+        # while the rest of the answer is still being generated
+        printer = ProgressivePrinter(f"Chatbot Response ({session.language_name}): ")
+        cancel_event = threading.Event()
+        chunks = stream_faq_response(user_text, cancel_event)
+        try:
+            if session.mode == "write" and session.preferred_language == "en":
+                response = speak_streaming(printer.echo(chunks), "en", synthesizer_pool, session.volume)
+            else:
+                response = speak_streaming(
+                    chunks, session.preferred_language, synthesizer_pool, session.volume,
+                    on_sentence=lambda sentence: printer(sentence + " "),
+                )
+        except KeyboardInterrupt:
+            cancel_event.set()  # Stop generating an answer nobody will read
+            printer.finish()
+            print("Response interrupted.")
             continue
+        printer.finish()
 
-        # Translate the response if the preferred language is not English
-        if preferred_language != "en":
-            response = translate_text(response, preferred_language)
-
-        # Speak the response in the preferred language
-        if preferred_language in voices:
-            speech_config = speech_sdk.SpeechConfig(subscription=config['speech_key'], region=config['speech_region'])
-            speech_config.speech_synthesis_voice_name = voices[preferred_language][0]
-
-            localized_synthesizer = speech_sdk.SpeechSynthesizer(speech_config=speech_config)
-            localized_synthesizer.speak_text_async(response).get()
-            print(f"Chatbot Response ({voices[preferred_language][1]}): {response}")
-        else:
+        if not response:
+            response = session.fallback_reply()
             print(f"Chatbot: {response}")
+            if session.mode == "speak":
+                synthesizer_pool.speak(response, voices["en"][0], session.volume)
 
+    if listener is not None:
+        listener.stop()
     print("Chatbot session ended.")
 
 
-if __name__ == "_main_":
+if __name__ == "__main__":
     config = load_environment_variables()
+    if os.getenv("METRICS_FILE"):
+        # Saved on any exit, including 'quit' in speak mode
+        atexit.register(metrics.write, os.getenv("METRICS_FILE"))
     chatbot_interaction(config)
\ No newline at end of file
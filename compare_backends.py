@@ -0,0 +1,122 @@
+import argparse
+import json
+import multiprocessing
+import statistics
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from faq_index import DEFAULT_FAQ_FILE, load_faq_entries, normalize_text
+from generation import GENERATION_KWARGS
+from model_registry import BACKENDS, QA_MODEL_NAME, build_pipeline
+
+
+def token_f1(prediction, reference):
+    """Token-overlap F1 between two answers after normalization."""
+    predicted_tokens = normalize_text(prediction).split()
+    reference_tokens = normalize_text(reference).split()
+    common = sum((Counter(predicted_tokens) & Counter(reference_tokens)).values())
+    if not common:
+        return 0.0
+    precision = common / len(predicted_tokens)
+    recall = common / len(reference_tokens)
+    return 2 * precision * recall / (precision + recall)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def peak_memory_mb():
+    """Peak resident memory of this process in MB, where the platform reports it."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_backend(backend, entries, model_name, num_threads, repeats):
+    started = time.perf_counter()
+    qa_pipeline = build_pipeline(model_name, backend=backend, num_threads=num_threads)
+    load_seconds = time.perf_counter() - started
+    qa_pipeline(entries[0][0], **GENERATION_KWARGS)  # Warmup
+
+    answers = []
+    latencies = []
+    for question, _ in entries:
+        for _ in range(repeats):
+            started = time.perf_counter()
+            result = qa_pipeline(question, **GENERATION_KWARGS)
+            latencies.append(time.perf_counter() - started)
+        answers.append(result[0]["generated_text"])
+
+    return {
+        "backend": backend,
+        "load_seconds": load_seconds,
+        "latency_p50_ms": percentile(latencies, 0.50) * 1000,
+        "latency_p95_ms": percentile(latencies, 0.95) * 1000,
+        "latency_mean_ms": statistics.mean(latencies) * 1000,
+        "faq_token_f1": statistics.mean(token_f1(answer, reference) for answer, (_, reference) in zip(answers, entries)),
+        "peak_memory_mb": peak_memory_mb(),
+        "answers": answers,
+    }
+
+
+def run_backend_isolated(backend, entries, model_name, num_threads, repeats):
+    """
+    Run one backend in a fresh process, so its peak memory is its own and thread
+    settings such as torch.set_num_threads do not carry over to the next backend.
+    """
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+        return executor.submit(run_backend, backend, entries, model_name, num_threads, repeats).result()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare QA inference backends on the FAQ questions: load time, latency and answer quality.",
+        epilog="Accuracy is reported as exact-match agreement with the first backend (normally the fp32 "
+               "PyTorch baseline) and as token F1 against the curated FAQ answers.",
+    )
+    parser.add_argument("--backends", default=",".join(BACKENDS), help="Comma-separated backends; the first is the baseline")
+    parser.add_argument("--model", default=QA_MODEL_NAME)
+    parser.add_argument("--faq-file", default=DEFAULT_FAQ_FILE)
+    parser.add_argument("--threads", type=int, default=None, help="Intra-op threads for every backend")
+    parser.add_argument("--repeats", type=int, default=1, help="Timed runs per question")
+    parser.add_argument("--limit", type=int, default=None, help="Only use the first N FAQ questions")
+    parser.add_argument("--output", help="Write the full results, including answers, to this JSON file")
+    args = parser.parse_args()
+
+    entries = load_faq_entries(args.faq_file)[:args.limit]
+    results = []
+    for backend in [name.strip() for name in args.backends.split(",") if name.strip()]:
+        print(f"Running {backend} backend on {len(entries)} questions...")
+        try:
+            results.append(run_backend_isolated(backend, entries, args.model, args.threads, args.repeats))
+        except Exception as e:
+            print(f"Skipping {backend}: {e}")
+
+    if not results:
+        return
+    baseline = results[0]["answers"]
+    for result in results:
+        matches = sum(answer == expected for answer, expected in zip(result["answers"], baseline))
+        result["baseline_agreement"] = matches / len(baseline)
+
+    # Each backend ran in its own process, so peak memory is per backend
+    print(f"\n{'backend':<10}{'load s':>9}{'p50 ms':>10}{'p95 ms':>10}{'agree':>8}{'FAQ F1':>9}{'peak MB':>10}")
+    for result in results:
+        memory = f"{result['peak_memory_mb']:.0f}" if result["peak_memory_mb"] is not None else "n/a"
+        print(
+            f"{result['backend']:<10}{result['load_seconds']:>9.1f}{result['latency_p50_ms']:>10.1f}"
+            f"{result['latency_p95_ms']:>10.1f}{result['baseline_agreement']:>8.0%}{result['faq_token_f1']:>9.2f}{memory:>10}"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(results, output_file, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import azure.cognitiveservices.speech as speech_sdk
+from faq_index import normalize_text
+from metrics import metrics
+from translation import translate_text
+
+_STOPPED = object()
+
+
+class ContinuousRecognizer:
+    """
+    Keeps one recognition session open and turns its events into a queue of utterances.
+
+    Final results (`recognized` events) are queued for `get()`; partial hypotheses
+    (`recognizing` events) go to `on_partial(text)` so work can start before the speaker
+    finishes. While paused, results are dropped, so the bot does not hear its own replies.
+    An utterance that was already being heard during the pause is dropped too, since its
+    final result only arrives after the end-of-speech silence, once listening has resumed.
+    """
+
+    def __init__(self, recognizer, on_partial=None):
+        self.recognizer = recognizer
+        self.on_partial = on_partial
+        self._queue = queue.Queue()
+        self._listening = threading.Event()
+        self._running = False
+        self._last_partial_at = None
+        self._heard_while_paused = False
+        recognizer.recognized.connect(self._on_recognized)
+        recognizer.recognizing.connect(self._on_recognizing)
+        recognizer.canceled.connect(self._on_canceled)
+        recognizer.session_stopped.connect(self._on_stopped)
+
+    @property
+    def running(self):
+        return self._running
+
+    def start(self):
+        if not self._running:
+            self._running = True
+            self._listening.set()
+            self.recognizer.start_continuous_recognition_async().get()
+
+    def stop(self):
+        if self._running:
+            self._running = False
+            self.recognizer.stop_continuous_recognition_async().get()
+            self._queue.put(_STOPPED)
+
+    def pause(self):
+        """Drop results until `resume()`, e.g. while the bot is speaking."""
+        self._listening.clear()
+
+    def resume(self):
+        self._listening.set()
+
+    def _on_recognizing(self, evt):
+        self._last_partial_at = time.perf_counter()
+        if not self._listening.is_set():
+            self._heard_while_paused = True
+        if self._listening.is_set() and self.on_partial is not None and evt.result.text:
+            try:
+                self.on_partial(evt.result.text)
+            except Exception as e:
+                print(f"Error handling partial speech result: {e}")
+
+    def _on_recognized(self, evt):
+        if self._last_partial_at is not None:
+            # Time from the last partial hypothesis to the final result: the end-of-speech delay
+            metrics.record("recognition_final", time.perf_counter() - self._last_partial_at)
+            self._last_partial_at = None
+        heard_while_paused, self._heard_while_paused = self._heard_while_paused, False
+        if heard_while_paused or not self._listening.is_set():
+            return
+        if evt.result.reason == speech_sdk.ResultReason.RecognizedSpeech:
+            text = evt.result.text.strip(".!?\n ")
+            if text:
+                self._queue.put(text)
+        elif evt.result.reason == speech_sdk.ResultReason.NoMatch:
+            print("No speech recognized. Please try again.")
+
+    def _on_canceled(self, evt):
+        print(f"Speech recognition canceled: {getattr(evt, 'reason', evt)}")
+        self._running = False
+        self._queue.put(_STOPPED)
+
+    def _on_stopped(self, evt):
+        self._running = False
+        self._queue.put(_STOPPED)
+
+    def get(self, timeout=None):
+        """
+        Wait for the next utterance. Returns None if the timeout expires or recognition
+        stopped; resumes listening first if the recognizer was paused.
+        """
+        self.resume()
+        try:
+            text = self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        return None if text is _STOPPED else text
+
+    def __iter__(self):
+        while True:
+            text = self._queue.get()
+            if text is _STOPPED:
+                return
+            yield text
+
+
+class FAQPrefetcher:
+    """
+    Looks up partial speech hypotheses in the FAQ index while the customer is still
+    talking and pre-translates the matched answer. When the final result says the same
+    as the last partial one, `lookup()` returns that match instead of searching again.
+
+    `fallback(question, language)` does the lookup for finals with no matching partial
+    (default: the index's own `lookup_localized`).
+    """
+
+    def __init__(self, faq_index, max_workers=2, fallback=None):
+        self.faq_index = faq_index
+        self.fallback = fallback or faq_index.lookup_localized
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix="faq-prefetch")
+        self._seen = set()
+        self._lock = threading.Lock()
+        self._last = None  # (normalized partial text, language, lookup result)
+        self.prefetched = 0
+        self.reused = 0
+
+    def lookup(self, question, language="en"):
+        """Return the FAQ result for a final utterance, reusing the last partial's lookup when it matches."""
+        with self._lock:
+            last, self._last = self._last, None
+        if last is not None and last[:2] == (normalize_text(question), language):
+            with self._lock:
+                self.reused += 1
+            return last[2]
+        return self.fallback(question, language)
+
+    def prefetch(self, partial_text, language="en"):
+        result = self.faq_index.lookup_localized(partial_text, language)
+        with self._lock:
+            self._last = (normalize_text(partial_text), language, result)
+        if result is None:
+            return
+        answer, answer_language = result
+        with self._lock:
+            if (answer, language) in self._seen:
+                return
+            if len(self._seen) > 10000:
+                self._seen.clear()
+            self._seen.add((answer, language))
+            self.prefetched += 1
+        if answer_language != language:
+            self._executor.submit(translate_text, answer, language)
+
+
+class _FakeSignal:
+    def __init__(self):
+        self._callbacks = []
+
+    def connect(self, callback):
+        self._callbacks.append(callback)
+
+    def emit(self, evt):
+        for callback in self._callbacks:
+            callback(evt)
+
+
+class _FakeFuture:
+    def get(self):
+        return None
+
+
+class _FakeEvent:
+    def __init__(self, text, reason):
+        self.result = type("FakeResult", (), {"text": text, "reason": reason})()
+        self.reason = reason
+
+
+class FakeRecognizer:
+    """
+    Local stand-in for a SpeechRecognizer in continuous mode. Replays the given
+    transcripts word by word as partial hypotheses, then as final results.
+    """
+
+    def __init__(self, transcripts, word_delay=0.0, utterance_delay=0.0):
+        self.transcripts = list(transcripts)
+        self.word_delay = word_delay
+        self.utterance_delay = utterance_delay
+        self.recognized = _FakeSignal()
+        self.recognizing = _FakeSignal()
+        self.canceled = _FakeSignal()
+        self.session_stopped = _FakeSignal()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start_continuous_recognition_async(self):
+        self._thread = threading.Thread(target=self._replay, name="fake-recognizer", daemon=True)
+        self._thread.start()
+        return _FakeFuture()
+
+    def stop_continuous_recognition_async(self):
+        self._stop.set()
+        return _FakeFuture()
+
+    def _replay(self):
+        for transcript in self.transcripts:
+            words = transcript.split()
+            for count in range(1, len(words) + 1):
+                if self._stop.is_set():
+                    return
+                self.recognizing.emit(_FakeEvent(" ".join(words[:count]), speech_sdk.ResultReason.RecognizingSpeech))
+                time.sleep(self.word_delay)
+            self.recognized.emit(_FakeEvent(transcript, speech_sdk.ResultReason.RecognizedSpeech))
+            time.sleep(self.utterance_delay)
+        self.session_stopped.emit(_FakeEvent("", None))
@@ -0,0 +1,317 @@
+import ast
+import difflib
+import heapq
+import json
+import math
+import os
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+
+DEFAULT_FAQ_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Question_sample.txt")
+DEFAULT_MATCH_THRESHOLD = 0.6
+# A lookup scans at most this many postings (rarest n-grams first), then scores its best candidates exactly
+MAX_SCANNED_POSTINGS = 4096
+MAX_CANDIDATES = 32
+# Minimum difflib similarity for two words to count as the same word with a typo
+WORD_SIMILARITY = 0.8
+
+
+def normalize_text(text):
+    """Lowercase the text and replace punctuation and symbols with spaces."""
+    text = unicodedata.normalize("NFKC", text).lower().replace("’", "'")
+    chars = []
+    for char in text:
+        category = unicodedata.category(char)
+        if char == "'" or not (category.startswith("P") or category.startswith("S")):
+            chars.append(char)
+        else:
+            chars.append(" ")
+    return " ".join("".join(chars).split())
+
+
+def extract_features(normalized_text):
+    """
+    Build the sparse feature counts used for matching: word unigrams, word bigrams
+    and character trigrams (which absorb typos and small wording changes).
+    """
+    words = normalized_text.split()
+    features = Counter(f"w:{word}" for word in words)
+    features.update(f"b:{first} {second}" for first, second in zip(words, words[1:]))
+    padded = f" {normalized_text} "
+    features.update(f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2))
+    return features
+
+
+def words_match(word, other):
+    """True for the same word, an inflection ("ship" / "shipping") or a typo ("pakage" / "package")."""
+    if word == other:
+        return True
+    shorter, longer = sorted((word, other), key=len)
+    if len(shorter) >= 4 and longer.startswith(shorter):
+        return True
+    matcher = difflib.SequenceMatcher(None, word, other)
+    return (
+        matcher.real_quick_ratio() >= WORD_SIMILARITY
+        and matcher.quick_ratio() >= WORD_SIMILARITY
+        and matcher.ratio() >= WORD_SIMILARITY
+    )
+
+
+def load_faq_entries(path):
+    """
+    Load FAQ entries from a JSON file or a file in the `Question_sample.txt` format.
+
+    JSON files may hold either an object mapping questions to answers or a list of
+    {"question": ..., "answer": ...} objects.
+    """
+    with open(path, encoding="utf-8") as faq_file:
+        content = faq_file.read()
+
+    if path.lower().endswith(".json"):
+        data = json.loads(content)
+        if isinstance(data, dict):
+            return list(data.items())
+        return [(item["question"], item["answer"]) for item in data]
+
+    # Question_sample.txt holds the body of a Python dict literal: "question": "answer",
+    data = ast.literal_eval("{" + content.strip().rstrip(",") + "}")
+    return list(data.items())
+
+
+class FAQIndex:
+    """
+    TF-IDF weighted n-gram index over FAQ questions.
+
+    The index is built once. A lookup walks the postings of the query's n-grams from the
+    rarest up, and stops before scanning more than `max_scanned_postings` of them: the
+    common n-grams it skips (" ho", "my ") occur in most entries and carry little weight.
+    The `max_candidates` best partial matches are then scored exactly, so the cost of a
+    lookup stays flat as the FAQ grows to tens of thousands of entries.
+
+    The score is the n-gram cosine times the query's word coverage: the IDF-weighted share
+    of query words found in the FAQ question. Shared function words and trigrams alone
+    cannot carry a match, so "cancel my gift card" does not match "cancel my order".
+    """
+
+    def __init__(self, entries, threshold=DEFAULT_MATCH_THRESHOLD,
+                 max_scanned_postings=MAX_SCANNED_POSTINGS, max_candidates=MAX_CANDIDATES):
+        self.threshold = threshold
+        self.max_scanned_postings = max_scanned_postings
+        self.max_candidates = max_candidates
+        self._questions = []
+        self._answers = []
+        self._exact = {}
+        self._words = []
+        self._vectors = []
+        self._postings = defaultdict(list)
+        self._idf = {}
+
+        documents = []
+        for question, answer in entries:
+            normalized = normalize_text(question)
+            if not normalized:
+                continue
+            if normalized in self._exact:
+                # Later entries override earlier ones, like a dict would
+                self._answers[self._exact[normalized]] = answer
+                continue
+            self._exact[normalized] = len(self._questions)
+            self._questions.append(question)
+            self._answers.append(answer)
+            self._words.append(set(normalized.split()))
+            documents.append(extract_features(normalized))
+
+        document_frequency = Counter()
+        for features in documents:
+            document_frequency.update(features.keys())
+
+        total = len(documents)
+        self._unknown_idf = math.log(1 + total) + 1
+        self._idf = {
+            feature: math.log((1 + total) / (1 + count)) + 1
+            for feature, count in document_frequency.items()
+        }
+
+        for doc_id, features in enumerate(documents):
+            vector = self._weigh(features)
+            self._vectors.append(vector)
+            for feature, weight in vector.items():
+                self._postings[feature].append((doc_id, weight))
+
+    @classmethod
+    def from_file(cls, path=DEFAULT_FAQ_FILE, threshold=DEFAULT_MATCH_THRESHOLD):
+        """Build an index from an FAQ file (see `load_faq_entries`)."""
+        return cls(load_faq_entries(path), threshold=threshold)
+
+    def __len__(self):
+        return len(self._questions)
+
+    def answers(self):
+        """Return the distinct FAQ answers, e.g. for pre-translating them."""
+        return list(dict.fromkeys(self._answers))
+
+    def _weigh(self, features):
+        """Return the L2-normalized TF-IDF vector for the given feature counts."""
+        vector = {
+            feature: (1 + math.log(count)) * self._idf.get(feature, self._unknown_idf)
+            for feature, count in features.items()
+        }
+        norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+        if not norm:
+            return {}
+        return {feature: weight / norm for feature, weight in vector.items()}
+
+    def match(self, question, threshold=None):
+        """
+        Find the closest FAQ entry for the question.
+
+        Returns a (matched_question, answer, score) tuple, or None when no entry scores at
+        least the threshold.
+        """
+        threshold = self.threshold if threshold is None else threshold
+        normalized = normalize_text(question)
+        if not normalized:
+            return None
+
+        doc_id = self._exact.get(normalized)
+        if doc_id is not None:
+            return self._questions[doc_id], self._answers[doc_id], 1.0
+
+        query = self._weigh(extract_features(normalized))
+        partial_scores = defaultdict(float)
+        scanned = 0
+        for feature in sorted(query, key=lambda feature: len(self._postings.get(feature, ()))):
+            postings = self._postings.get(feature)
+            if not postings:
+                continue
+            if scanned and scanned + len(postings) > self.max_scanned_postings:
+                break  # Every remaining n-gram is at least this common
+            scanned += len(postings)
+            for doc_id, doc_weight in postings:
+                partial_scores[doc_id] += query[feature] * doc_weight
+
+        if not partial_scores:
+            return None
+        candidates = heapq.nlargest(self.max_candidates, partial_scores, key=partial_scores.get)
+        similarities = sorted(
+            ((self._score(query, doc_id), doc_id) for doc_id in candidates), reverse=True
+        )
+        words = set(normalized.split())
+        doc_id, score = None, 0.0
+        for similarity, candidate in similarities:
+            if similarity <= score or similarity < threshold:
+                break  # Coverage is at most 1, so no later candidate can score higher
+            candidate_score = similarity * self._coverage(words, candidate)
+            if candidate_score > score:
+                doc_id, score = candidate, candidate_score
+        if doc_id is None or score < threshold:
+            return None
+        return self._questions[doc_id], self._answers[doc_id], score
+
+    def _score(self, query, doc_id):
+        """Cosine similarity between a weighted query and an indexed question."""
+        vector = self._vectors[doc_id]
+        return sum(weight * vector.get(feature, 0.0) for feature, weight in query.items())
+
+    def _coverage(self, words, doc_id):
+        """IDF-weighted share of the query words that appear in an indexed question."""
+        question_words = self._words[doc_id]
+        total = covered = 0.0
+        for word in words:
+            weight = self._idf.get(f"w:{word}", self._unknown_idf)
+            total += weight
+            if word in question_words or any(words_match(word, other) for other in question_words):
+                covered += weight
+        return covered / total if total else 0.0
+
+    def lookup(self, question):
+        """Return the answer of the closest FAQ entry, or None if nothing is close enough."""
+        result = self.match(question)
+        return result[1] if result else None
+
+
+class MultilingualFAQIndex:
+    """
+    One lookup index over the FAQ questions in English and every localized language.
+
+    Starts out English-only; `add_language()` adds the localized questions and answers
+    for a language (normally machine-translated once at startup and cached). A question
+    in any indexed language then matches its FAQ entry directly, and the answer comes
+    back already localized, with no model or translation call.
+    """
+
+    def __init__(self, entries, threshold=DEFAULT_MATCH_THRESHOLD):
+        self.threshold = threshold
+        self._entries = list(entries)
+        self._localized = {}  # language -> (questions, answers), aligned with self._entries
+        self._lock = threading.Lock()
+        self._index = self._build()
+
+    @classmethod
+    def from_file(cls, path=DEFAULT_FAQ_FILE, threshold=DEFAULT_MATCH_THRESHOLD):
+        """Build an index from an FAQ file (see `load_faq_entries`)."""
+        return cls(load_faq_entries(path), threshold=threshold)
+
+    def _build(self):
+        # Each variant's "answer" is (entry id, language) so a match maps back to its FAQ entry
+        variants = [(question, (entry_id, "en")) for entry_id, (question, _) in enumerate(self._entries)]
+        for language, (questions, _) in self._localized.items():
+            variants.extend((question, (entry_id, language)) for entry_id, question in enumerate(questions))
+        return FAQIndex(variants, threshold=self.threshold)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def entries(self):
+        """Return the English (question, answer) entries, in entry order."""
+        return list(self._entries)
+
+    def answers(self):
+        """Return the distinct English FAQ answers, e.g. for pre-translating them."""
+        return list(dict.fromkeys(answer for _, answer in self._entries))
+
+    def languages(self):
+        return ["en"] + list(self._localized)
+
+    def add_language(self, language, questions, answers):
+        """
+        Add localized questions and answers for a language, aligned with the English
+        entries. An answer of None keeps that entry's English answer.
+        """
+        if len(questions) != len(self._entries) or len(answers) != len(self._entries):
+            raise ValueError("Localized questions and answers must match the FAQ entries one to one")
+        with self._lock:
+            self._localized[language] = (list(questions), list(answers))
+            self._index = self._build()  # Swapped in whole, so concurrent lookups never see a partial index
+
+    def _answer(self, entry_id, language):
+        if language in self._localized:
+            answer = self._localized[language][1][entry_id]
+            if answer is not None:
+                return answer, language
+        return self._entries[entry_id][1], "en"
+
+    def lookup_localized(self, question, language="en", threshold=None):
+        """
+        Return (answer, answer_language) for the closest FAQ entry, with the answer in
+        `language` when a localized one exists and in English otherwise, or None.
+        """
+        result = self._index.match(question, threshold)
+        if result is None:
+            return None
+        entry_id, _ = result[1]
+        return self._answer(entry_id, language)
+
+    def match(self, question, threshold=None, language="en"):
+        """Like `FAQIndex.match`: (matched_question, answer, score) or None."""
+        result = self._index.match(question, threshold)
+        if result is None:
+            return None
+        matched_question, (entry_id, _), score = result
+        return matched_question, self._answer(entry_id, language)[0], score
+
+    def lookup(self, question, language="en"):
+        """Return the answer of the closest FAQ entry, or None if nothing is close enough."""
+        result = self.lookup_localized(question, language)
+        return result[0] if result else None
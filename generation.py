@@ -0,0 +1,241 @@
+import functools
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from admission import AdmissionController
+from batching import MicroBatchScheduler
+from cache import CACHE_DIR, PersistentCache, make_cache_key
+from faq_index import normalize_text
+from metrics import metrics
+from model_registry import build_pipeline, qa_registry
+from worker_pool import InferenceWorkerPool
+
+# Greedy decoding keeps batched answers identical to one-at-a-time generation
+GENERATION_KWARGS = {"max_length": 150, "do_sample": False}
+
+
+def run_generation(qa_pipeline, questions):
+    """Run one padded generate call for a batch of questions on the given pipeline."""
+    results = qa_pipeline(questions, batch_size=len(questions), **GENERATION_KWARGS)
+    # The pipeline returns a dict per input, or a one-element list per input on some versions
+    return [(result[0] if isinstance(result, list) else result)['generated_text'] for result in results]
+
+
+def generate_batch(questions):
+    """Run one padded generate call for a batch of questions on the shared model."""
+    return run_generation(qa_registry.get(), questions)  # Waits for the shared model if it is still loading
+
+
+qa_scheduler = MicroBatchScheduler(
+    generate_batch,
+    max_batch_size=int(os.getenv("QA_MAX_BATCH_SIZE", "8")),
+    max_wait_ms=float(os.getenv("QA_BATCH_WAIT_MS", "10")),
+    name="qa-batcher",
+)
+
+
+# Bounds the generations in flight and waiting, and sheds the rest (see admission.Overloaded)
+qa_admission = AdmissionController(
+    max_concurrent=int(os.getenv("QA_MAX_CONCURRENT", "16")),
+    max_queue=int(os.getenv("QA_MAX_QUEUE", "32")),
+    deadline_seconds=float(os.getenv("QA_DEADLINE_SECONDS", "10")) or None,
+)
+
+# Set by start_worker_pool(); when present, generation runs in worker processes
+qa_worker_pool = None
+
+
+def start_worker_pool(num_workers=None, threads_per_worker=None):
+    """
+    Move generation into QA_WORKERS worker processes (see worker_pool.InferenceWorkerPool),
+    each with QA_WORKER_THREADS intra-op threads (default: cores / workers). A worker that
+    takes longer than QA_WORKER_TIMEOUT seconds (default 120, 0 for none) on one batch is
+    restarted. Call it first thing at startup. Returns the pool, or None when QA_WORKERS is unset or 0.
+    """
+    global qa_worker_pool
+    num_workers = int(os.getenv("QA_WORKERS", "0")) if num_workers is None else num_workers
+    if qa_worker_pool is not None or num_workers <= 0:
+        return qa_worker_pool
+    threads_per_worker = (
+        threads_per_worker or int(os.getenv("QA_WORKER_THREADS", "0")) or max(1, (os.cpu_count() or 1) // num_workers)
+    )
+    pool = InferenceWorkerPool(
+        functools.partial(
+            build_pipeline, qa_registry.model_name, qa_registry.task, qa_registry.backend, threads_per_worker
+        ),
+        run_generation,
+        num_workers=num_workers,
+        threads_per_worker=threads_per_worker,
+        max_batch_size=qa_scheduler.max_batch_size,
+        # ONNX Runtime sessions own thread pools that do not survive a fork
+        share_weights=qa_registry.backend != "onnx",
+        warmup_item=qa_registry.warmup_prompt,
+        request_timeout=float(os.getenv("QA_WORKER_TIMEOUT", "120")) or None,
+    )
+    pool.start()
+    qa_worker_pool = pool
+    return pool
+
+
+def model_ready():
+    """True once generation can run without waiting for a model to load."""
+    return qa_worker_pool.ready if qa_worker_pool is not None else qa_registry.ready
+
+
+def worker_stats():
+    return qa_worker_pool.stats() if qa_worker_pool is not None else None
+
+
+answer_cache = PersistentCache(
+    os.getenv("ANSWER_CACHE_PATH", os.path.join(CACHE_DIR, "answers.sqlite")),
+    max_entries=int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "10000")),
+    max_disk_entries=int(os.getenv("ANSWER_CACHE_MAX_DISK_ENTRIES", "100000")),
+    ttl_seconds=float(os.getenv("ANSWER_CACHE_TTL_SECONDS", str(7 * 24 * 3600))),
+)
+
+
+def answer_cache_key(question):
+    """Cache key for a generated answer: normalized question, model and generation settings."""
+    return make_cache_key(normalize_text(question), qa_registry.model_id, GENERATION_KWARGS)
+
+
+def submit_answer(question, check_cache=True):
+    """
+    Queue a question for generation without waiting and return a Future for its answer.
+    Cached answers resolve immediately; new answers are cached when they complete.
+    Submitting many questions at once lets the scheduler or worker pool batch them.
+    Pass check_cache=False when the caller has just missed the cache itself.
+    """
+    key = answer_cache_key(question)
+    answer = answer_cache.get(key) if check_cache else None
+    if answer is not None:
+        future = Future()
+        future.set_result(answer)
+        return future
+
+    def cache_answer(done):
+        if not done.cancelled() and done.exception() is None:
+            answer_cache.put(key, done.result())
+
+    future = (qa_worker_pool if qa_worker_pool is not None else qa_scheduler).submit(question)
+    future.add_done_callback(cache_answer)
+    return future
+
+
+@metrics.timed("generation")
+def generate_answer(question, deadline_seconds=None):
+    """
+    Generate an answer with the QA model, batched together with concurrent callers.
+    Raises admission.Overloaded instead of waiting when generation is over its budget
+    or the answer is not ready within the deadline (default QA_DEADLINE_SECONDS).
+    """
+    answer = answer_cache.get(answer_cache_key(question))
+    if answer is not None:
+        return answer
+    return qa_admission.run(lambda: submit_answer(question, check_cache=False), deadline_seconds)
+
+
+_stream_lock = threading.Lock()
+_stream_counts = {"streams": 0, "completed": 0, "cancelled": 0}
+_time_to_first_token = deque(maxlen=1000)
+
+
+def stream_stats():
+    """Return stream counters and time-to-first-token (seconds) over recent streams."""
+    with _stream_lock:
+        samples = sorted(_time_to_first_token)
+        stats = dict(_stream_counts)
+    stats["ttft_samples"] = len(samples)
+    stats["ttft_average"] = sum(samples) / len(samples) if samples else 0.0
+    stats["ttft_p50"] = samples[len(samples) // 2] if samples else 0.0
+    stats["ttft_p95"] = samples[min(len(samples) - 1, int(len(samples) * 0.95))] if samples else 0.0
+    return stats
+
+
+def _count_stream(outcome):
+    with _stream_lock:
+        _stream_counts[outcome] += 1
+
+
+def stream_answer(question, cancel_event=None):
+    """
+    Yield the answer as text pieces while the QA model generates it.
+
+    Streams bypass the micro-batcher so tokens reach the caller immediately. Setting
+    `cancel_event`, or closing the generator early, stops generation at the next token.
+    Cached answers are yielded in one piece; completed answers are added to the cache.
+    A running stream holds a generation admission slot, like a batched request.
+    In worker-pool mode the answer is generated in a worker and also arrives in one piece.
+    """
+    key = answer_cache_key(question)
+    answer = answer_cache.get(key)
+    if answer is not None:
+        yield answer
+        return
+    if qa_worker_pool is not None:
+        yield generate_answer(question)
+        return
+
+    from transformers import StoppingCriteria, StoppingCriteriaList, TextIteratorStreamer
+
+    class CancelCriteria(StoppingCriteria):
+        def __call__(self, input_ids, scores, **kwargs):
+            return cancel_event.is_set()
+
+    cancel_event = cancel_event or threading.Event()
+    qa_pipeline = qa_registry.get()  # Waits for the shared model if it is still loading
+    tokenizer, model = qa_pipeline.tokenizer, qa_pipeline.model
+    inputs = tokenizer(question, return_tensors="pt").to(model.device)
+    streamer = TextIteratorStreamer(tokenizer, skip_special_tokens=True)
+    errors = []
+
+    def generate():
+        try:
+            model.generate(
+                **inputs, streamer=streamer, stopping_criteria=StoppingCriteriaList([CancelCriteria()]),
+                **GENERATION_KWARGS,
+            )
+        except Exception as e:
+            errors.append(e)
+            streamer.end()
+
+    qa_admission.acquire()  # Raises Overloaded when generation is over budget
+    _count_stream("streams")
+    started = time.perf_counter()
+    thread = threading.Thread(target=generate, name="qa-stream", daemon=True)
+    thread.start()
+
+    pieces = []
+    completed = False
+    try:
+        for piece in streamer:
+            if cancel_event.is_set():
+                break
+            if not piece:
+                continue
+            if not pieces:
+                first_token_seconds = time.perf_counter() - started
+                metrics.record("generation_first_token", first_token_seconds)
+                with _stream_lock:
+                    _time_to_first_token.append(first_token_seconds)
+            pieces.append(piece)
+            yield piece
+        completed = not cancel_event.is_set()
+    finally:
+        if not completed:
+            # Interrupted by the caller: stop the model instead of finishing an unread answer
+            cancel_event.set()
+            _count_stream("cancelled")
+        thread.join()
+        qa_admission.release()
+
+    if errors:
+        raise errors[0]
+    if not completed:
+        return
+    _count_stream("completed")
+    answer = "".join(pieces).strip()
+    if answer:
+        answer_cache.put(key, answer)
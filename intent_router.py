@@ -0,0 +1,142 @@
+import json
+import os
+from faq_index import normalize_text
+
+# Built-in intents: phrase -> preset value. Language and volume phrases without a preset
+# take their value from the rest of the utterance ("switch to hindi", "volume 60").
+DEFAULT_INTENTS = {
+    "quit": {
+        "quit": None, "exit": None, "bye": None, "goodbye": None, "good bye": None, "stop": None,
+        "that's all": None, "that is all": None, "i'm done": None, "i am done": None, "see you": None,
+    },
+    "greeting": {
+        "hi": None, "hello": None, "hey": None, "greetings": None, "good morning": None,
+        "good afternoon": None, "good evening": None, "namaste": None, "hola": None, "bonjour": None,
+    },
+    "language": {
+        "switch to": None, "change to": None, "change language to": None, "set language to": None,
+        "language": None, "speak in": None, "reply in": None, "answer in": None, "talk in": None,
+    },
+    "volume": {
+        "volume": None, "set volume to": None, "set the volume to": None, "change volume to": None,
+        "louder": "up", "speak up": "up", "volume up": "up", "turn it up": "up", "turn up the volume": "up",
+        "quieter": "down", "softer": "down", "volume down": "down", "turn it down": "down",
+        "turn down the volume": "down", "mute": "mute", "max volume": "max", "full volume": "max",
+    },
+    "help": {
+        "help": None, "help me": None, "what can i ask": None, "what can i say": None, "options": None,
+        "menu": None,
+    },
+}
+
+# Intents whose value must come from the utterance when the phrase has no preset
+SLOT_INTENTS = ("language", "volume")
+
+# Words that may surround an intent phrase without turning it into a real question
+FILLER_WORDS = {
+    "please", "pls", "now", "ok", "okay", "so", "um", "uh", "well", "just", "again", "there",
+    "thanks", "thank", "you", "the", "a", "to", "at", "of", "set", "level", "percent", "me",
+    "it", "bot", "chatbot", "assistant", "everyone", "all",
+}
+
+# Language codes and the names a customer may say, in English and in the language itself
+LANGUAGE_ALIASES = {
+    "en": "en", "hi": "hi", "mr": "mr", "fr": "fr", "es": "es", "ja": "ja", "ko": "ko",
+    "english": "en", "hindi": "hi", "हिंदी": "hi", "हिन्दी": "hi", "marathi": "mr", "मराठी": "mr",
+    "french": "fr", "français": "fr", "francais": "fr", "spanish": "es", "español": "es", "espanol": "es",
+    "japanese": "ja", "日本語": "ja", "korean": "ko", "한국어": "ko",
+}
+
+
+class IntentRouter:
+    """
+    Recognizes control utterances (quit, greetings, language and volume changes, help)
+    with a word-level trie built once at startup.
+
+    The utterance is normalized like FAQ questions. The longest phrase in the trie that
+    starts at its first non-filler word wins. Every other word must be a filler word or
+    the intent's value (a language name or a number). Otherwise the utterance is a real
+    question: "hi there" is a greeting, "hi, how do I track my order" is not.
+    """
+
+    def __init__(self, intents=None, fillers=FILLER_WORDS, language_aliases=LANGUAGE_ALIASES):
+        self.fillers = set(fillers)
+        self.language_aliases = dict(language_aliases)
+        self._trie = {}
+        for intent, phrases in (intents or DEFAULT_INTENTS).items():
+            for phrase, value in phrases.items():
+                self.add_phrase(intent, phrase, value)
+
+    @classmethod
+    def from_config(cls, path=None):
+        """
+        Build the default router, extended by an optional JSON file. Each key names an
+        intent. A list adds phrases to a built-in intent. An object
+        {"phrases": [...], "reply": "..."} defines a new intent answered with a fixed reply.
+        Raises ValueError for a new intent without a reply, or a built-in one with a reply.
+        """
+        router = cls()
+        if not path:
+            return router
+        with open(path, encoding="utf-8") as config_file:
+            config = json.load(config_file)
+        for intent, definition in config.items():
+            if isinstance(definition, list):
+                definition = {"phrases": definition}
+            reply = definition.get("reply")
+            if intent in DEFAULT_INTENTS and reply is not None:
+                raise ValueError(f"{path}: built-in intent {intent!r} cannot have a fixed reply")
+            if intent not in DEFAULT_INTENTS and not isinstance(reply, str):
+                raise ValueError(f"{path}: intent {intent!r} is not built in and needs a \"reply\" string")
+            for phrase in definition.get("phrases", []):
+                router.add_phrase(intent, phrase, reply)
+        return router
+
+    def add_phrase(self, intent, phrase, value=None):
+        node = self._trie
+        for word in normalize_text(phrase).split():
+            node = node.setdefault(word, {})
+        node[None] = (intent, value)  # None is never a word, so it marks the end of a phrase
+
+    def _longest_phrase(self, words, start):
+        node = self._trie
+        match = None
+        for position in range(start, len(words)):
+            node = node.get(words[position])
+            if node is None:
+                break
+            if None in node:
+                match = node[None], position + 1
+        return match
+
+    def route(self, text):
+        """Return (intent, value) for a control utterance, or None for anything else."""
+        words = normalize_text(text).split()
+        start = 0
+        while start < len(words) and words[start] in self.fillers and words[start] not in self._trie:
+            start += 1
+        match = self._longest_phrase(words, start)
+        if match is None:
+            if start == len(words) or words[start] not in self.language_aliases:
+                return None
+            # A bare language name ("hindi please") switches the language
+            match = ("language", None), start
+        (intent, value), end = match
+
+        rest = words[:start] + words[end:]
+        if intent == "language" and value is None:
+            value = next((self.language_aliases[word] for word in words[start:] if word in self.language_aliases), None)
+            rest = [word for word in rest if word not in self.language_aliases]
+        elif intent == "volume" and value is None:
+            value = next((int(word) for word in rest if word.isdigit()), None)
+            rest = [word for word in rest if not word.isdigit()]
+
+        if any(word not in self.fillers for word in rest):
+            return None
+        if intent in SLOT_INTENTS and value is None:
+            return None
+        return intent, value
+
+
+# Shared by every module in the process; INTENTS_FILE adds phrases and custom replies
+intent_router = IntentRouter.from_config(os.getenv("INTENTS_FILE"))
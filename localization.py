@@ -0,0 +1,80 @@
+import threading
+from translation import VOICES, translate_batch
+
+# Fixed replies spoken by the chatbot; pre-translated at startup so they never wait on the network
+GREETINGS = {
+    "morning": "Good morning! How can I assist you?",
+    "afternoon": "Good afternoon! How can I assist you?",
+    "evening": "Good evening! How can I assist you?",
+}
+FALLBACK_SPEAK = "That question seems incorrect. Please try rephrasing it."
+FALLBACK_WRITE = "That question seems incorrect. Please correct it and try again."
+GOODBYE = "Thank you! Have a nice day!"
+GOODBYE_SPOKEN = "Goodbye! Thank you for using the chatbot."
+# Spoken when a question is shed under load and no FAQ answer is close enough; one sentence so
+# sentence-by-sentence streaming still finds the pre-translated text
+BUSY = "We are getting a lot of questions right now, so please hold and ask again in a moment or contact one of our agents."
+
+HELP = (
+    "You can ask about orders, shipping, returns and payments. Say switch to Hindi to change the language, "
+    "volume 60 or louder to change the volume, or quit to leave."
+)
+LANGUAGE_CHANGED = "Language set to {name}."
+VOLUME_CHANGED = "Volume set to {volume}."
+
+STATIC_STRINGS = list(GREETINGS.values()) + [FALLBACK_SPEAK, FALLBACK_WRITE, GOODBYE, GOODBYE_SPOKEN, BUSY, HELP]
+STATIC_STRINGS += [LANGUAGE_CHANGED.format(name=name) for _, name in VOICES.values()]
+
+
+def prewarm_translations(texts, languages=None):
+    """
+    Translate each text into every non-English language so later lookups hit the
+    translation cache. Returns the number of (text, language) pairs warmed.
+    """
+    languages = [code for code in (languages or VOICES) if code != "en"]
+    if not texts or not languages:
+        return 0
+    translate_batch(texts, languages)
+    return len(texts) * len(languages)
+
+
+def localize_faq(faq_index, languages=None):
+    """
+    Translate the FAQ questions and answers into every non-English language and add them
+    to a MultilingualFAQIndex. Answers the translator could not handle (returned unchanged)
+    are left out, so those entries keep answering in English and get translated per reply.
+    """
+    languages = [code for code in (languages or VOICES) if code != "en"]
+    entries = faq_index.entries()
+    if not entries or not languages:
+        return []
+    questions = [question for question, _ in entries]
+    answers = [answer for _, answer in entries]
+    translated = translate_batch(questions + answers, languages)
+    for language in languages:
+        localized_questions = translated[language][:len(entries)]
+        localized_answers = [
+            localized if localized != answer else None
+            for localized, answer in zip(translated[language][len(entries):], answers)
+        ]
+        faq_index.add_language(language, localized_questions, localized_answers)
+    return languages
+
+
+def _prewarm(texts, languages, faq_index):
+    prewarm_translations(texts, languages)
+    if faq_index is not None:
+        localize_faq(faq_index, languages)
+
+
+def start_prewarm(extra_texts=(), languages=None, faq_index=None):
+    """
+    Pre-translate the static strings plus `extra_texts` in a background thread, then
+    localize `faq_index` (a MultilingualFAQIndex) into every language.
+    """
+    texts = list(dict.fromkeys(STATIC_STRINGS + list(extra_texts)))
+    thread = threading.Thread(
+        target=_prewarm, args=(texts, languages, faq_index), name="translation-prewarm", daemon=True
+    )
+    thread.start()
+    return thread
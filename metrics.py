@@ -0,0 +1,123 @@
+import functools
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not samples:
+        return 0.0
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+class StageMetrics:
+    """
+    Per-stage latency timers and named counters for a chatbot turn.
+
+    Each stage keeps exact totals plus a bounded window of recent samples for
+    percentiles. Export with `to_json()` or `to_prometheus()`.
+    """
+
+    def __init__(self, max_samples=10000):
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._samples = defaultdict(lambda: deque(maxlen=self.max_samples))
+        self._counts = defaultdict(int)
+        self._errors = defaultdict(int)
+        self._totals = defaultdict(float)
+        self._counters = defaultdict(int)
+
+    def record(self, stage, seconds, error=False):
+        with self._lock:
+            self._samples[stage].append(seconds)
+            self._counts[stage] += 1
+            self._totals[stage] += seconds
+            if error:
+                self._errors[stage] += 1
+
+    @contextmanager
+    def time(self, stage):
+        """Time the enclosed block as one sample of `stage`; exceptions count as errors."""
+        started = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.record(stage, time.perf_counter() - started, error=True)
+            raise
+        self.record(stage, time.perf_counter() - started)
+
+    def timed(self, stage):
+        """Decorator form of `time()`."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.time(stage):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def increment(self, counter, amount=1):
+        with self._lock:
+            self._counters[counter] += amount
+
+    def summary(self):
+        """Return {"stages": {stage: stats}, "counters": {name: value}}."""
+        with self._lock:
+            stages = {}
+            for stage, samples in self._samples.items():
+                ordered = sorted(samples)
+                count = self._counts[stage]
+                stages[stage] = {
+                    "count": count,
+                    "errors": self._errors[stage],
+                    "total_seconds": self._totals[stage],
+                    "mean_seconds": self._totals[stage] / count if count else 0.0,
+                    **{f"p{int(q * 100)}_seconds": percentile(ordered, q) for q in QUANTILES},
+                }
+            return {"stages": stages, "counters": dict(self._counters)}
+
+    def to_json(self):
+        return json.dumps(self.summary(), indent=2)
+
+    def to_prometheus(self, prefix="chatbot"):
+        """Render the metrics in the Prometheus text exposition format."""
+        summary = self.summary()
+        lines = [
+            f"# HELP {prefix}_stage_seconds Latency of each chatbot stage.",
+            f"# TYPE {prefix}_stage_seconds summary",
+        ]
+        for stage, stats in sorted(summary["stages"].items()):
+            for q in QUANTILES:
+                lines.append(f'{prefix}_stage_seconds{{stage="{stage}",quantile="{q}"}} {stats[f"p{int(q * 100)}_seconds"]:.6f}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{stage}"}} {stats["total_seconds"]:.6f}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{stage}"}} {stats["count"]}')
+        lines.append(f"# HELP {prefix}_stage_errors_total Failed calls per chatbot stage.")
+        lines.append(f"# TYPE {prefix}_stage_errors_total counter")
+        for stage, stats in sorted(summary["stages"].items()):
+            lines.append(f'{prefix}_stage_errors_total{{stage="{stage}"}} {stats["errors"]}')
+        for counter, value in sorted(summary["counters"].items()):
+            lines.append(f"# TYPE {prefix}_{counter}_total counter")
+            lines.append(f"{prefix}_{counter}_total {value}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """Write the metrics to a file: Prometheus text for .prom files, JSON otherwise."""
+        with open(path, "w", encoding="utf-8") as metrics_file:
+            metrics_file.write(self.to_prometheus() if path.endswith(".prom") else self.to_json())
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._counts.clear()
+            self._errors.clear()
+            self._totals.clear()
+            self._counters.clear()
+
+
+# Shared by every module in the process
+metrics = StageMetrics()
@@ -0,0 +1,123 @@
+import os
+import threading
+from cache import CACHE_DIR
+
+QA_MODEL_NAME = "google/flan-t5-base"
+QA_TASK = "text2text-generation"
+WARMUP_PROMPT = "What is your return policy?"
+
+# "pytorch": plain fp32 transformers model
+# "int8": PyTorch dynamic int8 quantization of the Linear layers
+# "onnx": ONNX Runtime encoder-decoder export with KV-cache (needs optimum[onnxruntime])
+BACKENDS = ("pytorch", "int8", "onnx")
+ONNX_EXPORT_DIR = os.getenv("ONNX_EXPORT_DIR", os.path.join(CACHE_DIR, "onnx"))
+
+
+def build_pipeline(model_name=QA_MODEL_NAME, task=QA_TASK, backend="pytorch", num_threads=None):
+    """Build a text2text pipeline on the requested CPU inference backend."""
+    from transformers import AutoTokenizer, pipeline  # Deferred so importing this module stays cheap
+
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown QA backend '{backend}'. Choose one of: {', '.join(BACKENDS)}")
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+
+    if backend == "onnx":
+        import onnxruntime
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM
+
+        session_options = onnxruntime.SessionOptions()
+        if num_threads:
+            session_options.intra_op_num_threads = num_threads
+        export_dir = os.path.join(ONNX_EXPORT_DIR, model_name.replace("/", "--"))
+        if os.path.isdir(export_dir):
+            model = ORTModelForSeq2SeqLM.from_pretrained(export_dir, use_cache=True, session_options=session_options)
+        else:
+            # Export once, then reuse the exported graphs on later starts
+            model = ORTModelForSeq2SeqLM.from_pretrained(
+                model_name, export=True, use_cache=True, session_options=session_options
+            )
+            model.save_pretrained(export_dir)
+        return pipeline(task, model=model, tokenizer=tokenizer)
+
+    import torch
+    from transformers import AutoModelForSeq2SeqLM
+
+    if num_threads:
+        torch.set_num_threads(num_threads)
+    model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
+    model.eval()
+    if backend == "int8":
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return pipeline(task, model=model, tokenizer=tokenizer)
+
+
+class ModelRegistry:
+    """
+    Lazily loads a Hugging Face pipeline and shares one instance across the process.
+
+    Nothing is loaded at import time. The pipeline is built on the first `get()` call,
+    or ahead of time in a background thread via `start_background_load()`, and a short
+    warmup inference runs before it is reported as ready.
+    """
+
+    def __init__(self, model_name=QA_MODEL_NAME, task=QA_TASK, warmup_prompt=WARMUP_PROMPT,
+                 backend="pytorch", num_threads=None):
+        self.model_name = model_name
+        self.task = task
+        self.warmup_prompt = warmup_prompt
+        self.backend = backend
+        self.num_threads = num_threads
+        self._pipeline = None
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._thread = None
+
+    @property
+    def ready(self):
+        """True once the pipeline is loaded and warmed up."""
+        return self._ready.is_set()
+
+    @property
+    def model_id(self):
+        """Model name plus backend; answers can differ slightly between backends."""
+        return f"{self.model_name}:{self.backend}"
+
+    def wait_until_ready(self, timeout=None):
+        """Block until the pipeline is ready; returns False if the timeout expired first."""
+        return self._ready.wait(timeout)
+
+    def start_background_load(self):
+        """Start loading the pipeline in a daemon thread so callers can keep serving."""
+        with self._lock:
+            if self._thread is not None or self._pipeline is not None:
+                return
+            self._thread = threading.Thread(target=self._background_load, name="model-loader", daemon=True)
+            self._thread.start()
+
+    def _background_load(self):
+        try:
+            self.get()
+        except Exception as e:
+            print(f"Error loading model {self.model_name}: {e}")
+
+    def get(self):
+        """Return the shared pipeline, loading and warming it up on first use."""
+        if self._pipeline is not None:
+            return self._pipeline
+
+        with self._lock:
+            if self._pipeline is None:
+                loaded_pipeline = build_pipeline(self.model_name, self.task, self.backend, self.num_threads)
+                loaded_pipeline(self.warmup_prompt, max_length=16, do_sample=False)
+                self._pipeline = loaded_pipeline
+                self._ready.set()
+                print(f"Model ready: {self.model_name} ({self.backend} backend)")
+        return self._pipeline
+
+
+# Shared by every module in the process
+qa_registry = ModelRegistry(
+    backend=os.getenv("QA_BACKEND", "pytorch"),
+    num_threads=int(os.getenv("QA_NUM_THREADS", "0")) or None,
+)
@@ -0,0 +1,284 @@
+import argparse
+import asyncio
+import base64
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from aiohttp import web, WSMsgType
+from dotenv import load_dotenv
+from generation import answer_cache, model_ready, qa_admission, qa_scheduler, start_worker_pool, stream_stats, worker_stats
+from localization import start_prewarm
+from metrics import metrics
+from model_registry import qa_registry
+from session import ChatSession, faq_index
+from translation import VOICES, translation_cache
+
+
+class ChatServer:
+    """
+    Serves many chat sessions from one process and one copy of the model.
+
+    Each session's turns run in order, but sessions never wait on each other: the
+    blocking stages of a turn (model generation, translation, speech synthesis) run on
+    separate bounded thread pools while the event loop keeps accepting requests.
+    """
+
+    def __init__(self, model_workers=None, translation_workers=8, speech_workers=4,
+                 synthesizer_pool=None, session_idle_seconds=1800):
+        # Enough model threads for every turn admission control lets in or queues, so
+        # overload is shed by the controller instead of piling up in the executor
+        model_workers = model_workers or qa_admission.max_concurrent + qa_admission.max_queue
+        self.model_executor = ThreadPoolExecutor(model_workers, thread_name_prefix="server-model")
+        self.translation_executor = ThreadPoolExecutor(translation_workers, thread_name_prefix="server-translate")
+        self.speech_executor = ThreadPoolExecutor(speech_workers, thread_name_prefix="server-speech")
+        self.synthesizer_pool = synthesizer_pool
+        self.session_idle_seconds = session_idle_seconds
+        self.sessions = {}  # session_id -> [ChatSession, asyncio.Lock, last_seen]
+        self.websocket_sessions = set()  # Live as long as their connection; never expired
+
+    async def _run(self, executor, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+
+    def create_session(self, settings=None):
+        """Create and register a session; invalid settings raise HTTPBadRequest before it is registered."""
+        session = ChatSession(mode="write")
+        if settings:
+            self.configure_session(session, settings)
+        self.sessions[session.session_id] = [session, asyncio.Lock(), time.monotonic()]
+        return session
+
+    def get_session(self, session_id):
+        entry = self.sessions.get(session_id)
+        if entry is None:
+            raise web.HTTPNotFound(text=f"Unknown session: {session_id}")
+        entry[2] = time.monotonic()
+        return entry
+
+    async def read_json(self, request):
+        """Parse a JSON object request body, or raise HTTPBadRequest."""
+        try:
+            body = await request.json()
+        except ValueError:
+            raise web.HTTPBadRequest(text="Request body must be valid JSON")
+        if not isinstance(body, dict):
+            raise web.HTTPBadRequest(text="Request body must be a JSON object")
+        return body
+
+    def configure_session(self, session, settings):
+        """
+        Apply language/volume changes from a request body. Every field is checked first, so
+        a rejected request (HTTPBadRequest) leaves the session unchanged.
+        """
+        language = settings.get("language")
+        if "language" in settings and not (isinstance(language, str) and language in VOICES):
+            raise web.HTTPBadRequest(text=f"Unsupported language: {language}")
+        if "volume" in settings:
+            try:
+                volume = int(settings["volume"])
+            except (TypeError, ValueError, OverflowError):
+                raise web.HTTPBadRequest(text="Volume must be an integer between 0 and 100")
+
+        if "language" in settings:
+            session.set_language(language)
+        if "volume" in settings:
+            session.set_volume(volume)
+        if settings.get("mode") in ("speak", "write"):
+            session.mode = settings["mode"]
+
+    def _model_reply(self, session, user_text, arrived):
+        """Generate on the model executor, with the deadline counted from when the turn arrived."""
+        deadline = qa_admission.deadline_seconds
+        remaining = None if deadline is None else deadline - (time.monotonic() - arrived)
+        return session.model_reply(user_text, remaining)
+
+    async def handle_turn(self, session, user_text, with_audio=False):
+        """Run one turn, offloading every blocking stage to its executor."""
+        with metrics.time("turn"):
+            arrived = time.monotonic()
+            user_text = user_text.strip(".!?\n ")
+            reply = session.quick_reply(user_text)
+            if reply is None:
+                reply = await self._run(self.model_executor, self._model_reply, session, user_text, arrived)
+            reply = await self._run(self.translation_executor, session.localize_reply, reply)
+
+            if with_audio and self.synthesizer_pool is not None and reply["text"]:
+                voice = VOICES[reply["language"]][0]
+                audio = await self._run(
+                    self.speech_executor, self.synthesizer_pool.synthesize, reply["text"], voice, session.volume
+                )
+                reply["audio"] = base64.b64encode(audio).decode("ascii")
+        return reply
+
+    def session_info(self, session):
+        return {
+            "session_id": session.session_id,
+            "mode": session.mode,
+            "language": session.preferred_language,
+            "volume": session.volume,
+        }
+
+    async def expire_idle_sessions(self):
+        """Drop sessions that have been idle for longer than `session_idle_seconds`."""
+        while True:
+            await asyncio.sleep(60)
+            cutoff = time.monotonic() - self.session_idle_seconds
+            for session_id, (_, lock, last_seen) in list(self.sessions.items()):
+                if session_id in self.websocket_sessions:
+                    continue  # Closed by the heartbeat instead when the client goes away
+                if last_seen < cutoff and not lock.locked():
+                    self.sessions.pop(session_id, None)
+
+    # HTTP handlers
+
+    async def health(self, request):
+        return web.json_response({
+            "status": "ok",
+            "model_ready": model_ready(),
+            "sessions": len(self.sessions),
+        })
+
+    async def stats(self, request):
+        return web.json_response({
+            "batching": qa_scheduler.stats(),
+            "workers": worker_stats(),
+            "admission": qa_admission.stats(),
+            "answer_cache": answer_cache.stats(),
+            "translation_cache": translation_cache.stats(),
+            "streams": stream_stats(),
+            "stages": metrics.summary(),
+            "sessions": len(self.sessions),
+        })
+
+    async def prometheus_metrics(self, request):
+        return web.Response(text=metrics.to_prometheus(), content_type="text/plain", charset="utf-8")
+
+    async def start_session(self, request):
+        session = self.create_session(await self.read_json(request) if request.can_read_body else None)
+        return web.json_response(self.session_info(session), status=201)
+
+    async def update_session(self, request):
+        session, lock, _ = self.get_session(request.match_info["session_id"])
+        async with lock:
+            self.configure_session(session, await self.read_json(request))
+        return web.json_response(self.session_info(session))
+
+    async def end_session(self, request):
+        self.get_session(request.match_info["session_id"])
+        self.sessions.pop(request.match_info["session_id"], None)
+        return web.json_response({"status": "closed"})
+
+    async def post_message(self, request):
+        session, lock, _ = self.get_session(request.match_info["session_id"])
+        body = await self.read_json(request)
+        if not isinstance(body.get("text"), str):
+            raise web.HTTPBadRequest(text="Request body needs a 'text' string")
+        async with lock:
+            reply = await self.handle_turn(session, body["text"], with_audio=bool(body.get("audio")))
+        if reply["kind"] == "quit":
+            self.sessions.pop(session.session_id, None)
+        return web.json_response(reply)
+
+    async def websocket(self, request):
+        """
+        One session per connection. Send {"text": ...} to ask a question, or
+        {"language": ..., "volume": ...} to change settings; every message gets a JSON reply.
+        """
+        ws = web.WebSocketResponse(heartbeat=30)
+        await ws.prepare(request)
+        session = self.create_session()
+        self.websocket_sessions.add(session.session_id)
+        await ws.send_json({"kind": "session", **self.session_info(session)})
+        try:
+            async for message in ws:
+                if message.type != WSMsgType.TEXT:
+                    continue
+                try:
+                    body = message.json()
+                except ValueError:
+                    body = None
+                if not isinstance(body, dict):
+                    body = {"text": message.data}
+                entry = self.sessions.get(session.session_id)
+                if entry is None:
+                    # Ended over HTTP (DELETE or a "quit" message) while the socket was open
+                    await ws.send_json({"kind": "error", "text": "Session has ended"})
+                    break
+                entry[2] = time.monotonic()
+                try:
+                    if "text" not in body:
+                        self.configure_session(session, body)
+                        await ws.send_json({"kind": "session", **self.session_info(session)})
+                        continue
+                    reply = await self.handle_turn(session, str(body["text"]), with_audio=bool(body.get("audio")))
+                except web.HTTPException as e:
+                    await ws.send_json({"kind": "error", "text": e.text})
+                    continue
+                await ws.send_json(reply)
+                if reply["kind"] == "quit":
+                    break
+        finally:
+            self.sessions.pop(session.session_id, None)
+            self.websocket_sessions.discard(session.session_id)
+        await ws.close()
+        return ws
+
+    def create_app(self):
+        app = web.Application()
+        app.add_routes([
+            web.get("/health", self.health),
+            web.get("/stats", self.stats),
+            web.get("/metrics", self.prometheus_metrics),
+            web.post("/sessions", self.start_session),
+            web.patch("/sessions/{session_id}", self.update_session),
+            web.delete("/sessions/{session_id}", self.end_session),
+            web.post("/sessions/{session_id}/messages", self.post_message),
+            web.get("/ws", self.websocket),
+        ])
+
+        async def start_background_tasks(app):
+            app["session_expiry"] = asyncio.create_task(self.expire_idle_sessions())
+
+        async def stop_background_tasks(app):
+            app["session_expiry"].cancel()
+            for executor in (self.model_executor, self.translation_executor, self.speech_executor):
+                executor.shutdown(wait=False, cancel_futures=True)
+
+        app.on_startup.append(start_background_tasks)
+        app.on_cleanup.append(stop_background_tasks)
+        return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the customer care chatbot as an HTTP/WebSocket server.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument(
+        "--model-workers", type=int, default=int(os.getenv("SERVER_MODEL_WORKERS", "0")) or None,
+        help="Threads waiting on generation (default: QA_MAX_CONCURRENT + QA_MAX_QUEUE)",
+    )
+    parser.add_argument("--translation-workers", type=int, default=int(os.getenv("SERVER_TRANSLATION_WORKERS", "8")))
+    parser.add_argument("--speech-workers", type=int, default=int(os.getenv("SERVER_SPEECH_WORKERS", "4")))
+    parser.add_argument("--audio", action="store_true", help="Enable synthesized audio in replies (needs SPEECH_KEY/SPEECH_REGION)")
+    args = parser.parse_args()
+
+    load_dotenv()
+    # Fork the generation workers (QA_WORKERS) before anything else starts a thread
+    worker_pool = start_worker_pool()
+    synthesizer_pool = None
+    if args.audio:
+        from speech_pool import SynthesizerPool
+        from translation import load_speech_config
+
+        synthesizer_pool = SynthesizerPool.from_speech_config(load_speech_config(), playback=False)
+
+    # Start serving FAQ and greeting traffic right away while the model loads
+    if worker_pool is None:
+        qa_registry.start_background_load()
+    start_prewarm(faq_index=faq_index)
+
+    server = ChatServer(args.model_workers, args.translation_workers, args.speech_workers, synthesizer_pool)
+    web.run_app(server.create_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+import os
+import uuid
+from datetime import datetime
+from faq_index import MultilingualFAQIndex, DEFAULT_FAQ_FILE, DEFAULT_MATCH_THRESHOLD
+from admission import Overloaded
+from generation import generate_answer, stream_answer
+from intent_router import intent_router
+from localization import (
+    BUSY, FALLBACK_SPEAK, FALLBACK_WRITE, GOODBYE, GREETINGS, HELP, LANGUAGE_CHANGED, VOLUME_CHANGED,
+)
+from metrics import metrics
+from translation import VOICES, translate_text
+
+DEFAULT_LANGUAGE = "en"
+DEFAULT_VOLUME = 75
+VOLUME_STEP = 15  # Change for "louder" / "quieter"
+
+# Build the FAQ index once at startup; FAQ_FILE may point to a larger JSON or text FAQ file.
+# Localized questions and answers are added in the background by localization.start_prewarm.
+faq_index = MultilingualFAQIndex.from_file(
+    os.getenv("FAQ_FILE", DEFAULT_FAQ_FILE),
+    threshold=float(os.getenv("FAQ_MATCH_THRESHOLD", DEFAULT_MATCH_THRESHOLD)),
+)
+# Looser match accepted when the model is too busy to answer
+FAQ_FALLBACK_THRESHOLD = float(os.getenv("FAQ_FALLBACK_THRESHOLD", "0.38"))
+
+
+@metrics.timed("faq_lookup")
+def lookup_faq(question, language=DEFAULT_LANGUAGE):
+    """
+    Match a question in any localized language against the FAQ. Returns
+    (answer, answer_language), with the answer in `language` when the FAQ has been
+    localized into it and in English otherwise, or None.
+    """
+    return faq_index.lookup_localized(question, language)
+
+
+def lookup_overload_fallback(question, language=DEFAULT_LANGUAGE):
+    """
+    Closest FAQ answer at the looser FAQ_FALLBACK_THRESHOLD, for questions shed under
+    load, as (answer, answer_language), or None.
+    """
+    result = faq_index.lookup_localized(question, language, threshold=FAQ_FALLBACK_THRESHOLD)
+    if result is not None:
+        metrics.increment("overload_fallbacks")
+    return result
+
+
+def get_faq_response(question):
+    """
+    Generate a response to the question using predefined FAQs or Hugging Face model.
+    """
+    result = lookup_faq(question)
+
+    if result:
+        return result[0]
+
+    try:
+        return generate_answer(question)
+    except Overloaded:
+        result = lookup_overload_fallback(question)
+        return result[0] if result else BUSY
+    except Exception as e:
+        print(f"Error with Hugging Face model: {e}")
+        return None
+
+
+def stream_faq_response(question, cancel_event=None):
+    """
+    Stream a response to the question: a FAQ answer is yielded whole, otherwise the
+    Hugging Face model's answer is yielded piece by piece as it is generated.
+    """
+    result = lookup_faq(question)
+
+    if result:
+        yield result[0]
+        return
+
+    yield from stream_model_response(question, cancel_event)
+
+
+def stream_model_response(question, cancel_event=None):
+    """
+    Stream the Hugging Face model's answer piece by piece, for questions that have
+    already missed the FAQ. When generation is overloaded, yield the closest FAQ answer
+    or the "please hold" message instead.
+    """
+    try:
+        yield from stream_answer(question, cancel_event)
+    except Overloaded:
+        result = lookup_overload_fallback(question)
+        yield result[0] if result else BUSY
+    except Exception as e:
+        print(f"Error with Hugging Face model: {e}")
+
+
+def get_real_time_greeting():
+    """Get a greeting based on the current time."""
+    current_hour = datetime.now().hour
+    if 5 <= current_hour < 12:
+        return GREETINGS["morning"]
+    elif 12 <= current_hour < 18:
+        return GREETINGS["afternoon"]
+    else:
+        return GREETINGS["evening"]
+
+
+class ChatSession:
+    """
+    State and turn logic for one customer conversation.
+
+    The session holds the input mode, response language and volume, and turns user text
+    into replies without touching input(), print() or audio, so the console loop and
+    the server can share it. Each reply is a dict with `kind`, `text` and `language`.
+    A turn has three stages (quick_reply, model_reply, localize_reply) so callers can run
+    the blocking ones on their own executors.
+    """
+
+    def __init__(self, mode=None, preferred_language=DEFAULT_LANGUAGE, volume=DEFAULT_VOLUME, session_id=None):
+        self.session_id = session_id or uuid.uuid4().hex
+        self.mode = mode
+        self.preferred_language = preferred_language if preferred_language in VOICES else DEFAULT_LANGUAGE
+        self.volume = volume
+
+    @property
+    def voice(self):
+        return VOICES[self.preferred_language][0]
+
+    @property
+    def language_name(self):
+        return VOICES[self.preferred_language][1]
+
+    def set_language(self, language_code):
+        """Switch the response language; returns False and keeps the current one for unknown codes."""
+        if isinstance(language_code, str) and language_code in VOICES:
+            self.preferred_language = language_code
+            return True
+        return False
+
+    def set_volume(self, volume):
+        self.volume = max(0, min(100, int(volume)))  # Ensure volume is within valid range
+        return self.volume
+
+    def localize(self, text):
+        """Translate English text into the session's language."""
+        if self.preferred_language != "en":
+            return translate_text(text, self.preferred_language)
+        return text
+
+    def fallback_reply(self):
+        return FALLBACK_SPEAK if self.mode == "speak" else FALLBACK_WRITE
+
+    def reply(self, kind, text, language=DEFAULT_LANGUAGE):
+        return {"kind": kind, "text": text, "language": language}
+
+    def quick_reply(self, user_text):
+        """Reply to turns that need no model call (control utterances, greetings, FAQ hits), else None."""
+        return self.control_reply(user_text) or self.faq_reply(user_text)
+
+    def control_reply(self, user_text):
+        """
+        Handle quit, greetings, language and volume changes, help and INTENTS_FILE replies
+        through the intent router, before any FAQ or model lookup. Returns None for other text.
+        """
+        route = intent_router.route(user_text)
+        if route is None:
+            return None
+        intent, value = route
+        if intent == "quit":
+            return self.reply("quit", GOODBYE)
+        if intent == "greeting":
+            return self.reply("greeting", get_real_time_greeting())
+        if intent == "language":
+            self.set_language(value)
+            return self.reply("language", LANGUAGE_CHANGED.format(name=self.language_name))
+        if intent == "volume":
+            changes = {"up": self.volume + VOLUME_STEP, "down": self.volume - VOLUME_STEP, "mute": 0, "max": 100}
+            return self.reply("volume", VOLUME_CHANGED.format(volume=self.set_volume(changes.get(value, value))))
+        if intent == "help":
+            return self.reply("help", HELP)
+        return self.reply("answer", value)  # Custom intents from INTENTS_FILE carry their reply
+
+    def faq_reply(self, user_text, lookup=lookup_faq):
+        """
+        Reply with the FAQ answer, already in the session's language where possible, or None.
+        `lookup` can replace lookup_faq, e.g. with a lookup already done on partial speech.
+        """
+        result = lookup(user_text, self.preferred_language)
+        if result is None:
+            return None
+        answer, language = result
+        return self.reply("answer", answer, language)
+
+    def model_reply(self, user_text, deadline_seconds=None):
+        """
+        Reply in English with the Hugging Face model, or the fallback message if it fails.
+        When generation is overloaded, reply with the closest FAQ answer or the "please hold" message.
+        `deadline_seconds` overrides QA_DEADLINE_SECONDS, e.g. with what is left after queueing.
+        """
+        try:
+            response = generate_answer(user_text, deadline_seconds)
+        except Overloaded:
+            result = lookup_overload_fallback(user_text, self.preferred_language)
+            return self.reply("answer", *result) if result else self.reply("busy", BUSY)
+        except Exception as e:
+            print(f"Error with Hugging Face model: {e}")
+            response = None
+        if not response:
+            return self.reply("fallback", self.fallback_reply())
+        return self.reply("answer", response)
+
+    def localize_reply(self, reply):
+        """Translate every reply except quit and fallback messages into the session's language."""
+        if reply["kind"] in ("greeting", "answer", "busy", "help", "language", "volume") and reply["language"] != self.preferred_language:
+            return self.reply(reply["kind"], self.localize(reply["text"]), self.preferred_language)
+        return reply
+
+    @metrics.timed("turn")
+    def respond(self, user_text):
+        """Run one full turn and return the reply."""
+        user_text = user_text.strip(".!?\n ")
+        reply = self.quick_reply(user_text) or self.model_reply(user_text)
+        return self.localize_reply(reply)
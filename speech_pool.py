@@ -0,0 +1,269 @@
+import io
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import wave
+from xml.sax.saxutils import escape
+import azure.cognitiveservices.speech as speech_sdk
+from cache import CACHE_DIR, make_cache_key
+from metrics import metrics
+
+AUDIO_CACHE_DIR = os.getenv("AUDIO_CACHE_DIR", os.path.join(CACHE_DIR, "audio"))
+
+# Command-line WAV players tried when simpleaudio is not installed (macOS, PulseAudio, ALSA, FFmpeg)
+COMMAND_PLAYERS = [
+    ["afplay"],
+    ["paplay"],
+    ["aplay", "-q"],
+    ["ffplay", "-nodisp", "-autoexit", "-loglevel", "quiet"],
+]
+
+
+def build_ssml(text, voice, volume=None):
+    """Wrap text in SSML for the given voice, with an optional 0-100 prosody volume."""
+    language = "-".join(voice.split("-")[:2])
+    body = escape(text)
+    if volume is not None:
+        body = f'<prosody volume="{int(volume)}">{body}</prosody>'
+    return (
+        f'<speak version="1.0" xmlns="http://www.w3.org/2001/10/synthesis" xml:lang="{language}">'
+        f'<voice name="{voice}">{body}</voice></speak>'
+    )
+
+
+def get_default_player():
+    """
+    Return a function that plays WAV bytes on the local speaker, or None when no
+    playback backend is available: winsound on Windows, simpleaudio elsewhere, or
+    else the first of COMMAND_PLAYERS found on the PATH.
+    """
+    try:
+        import winsound
+
+        return lambda audio_data: winsound.PlaySound(audio_data, winsound.SND_MEMORY)
+    except ImportError:
+        pass
+
+    try:
+        import simpleaudio
+    except ImportError:
+        return get_command_player()
+
+    def play(audio_data):
+        with wave.open(io.BytesIO(audio_data)) as wav:
+            frames = wav.readframes(wav.getnframes())
+            play_obj = simpleaudio.play_buffer(frames, wav.getnchannels(), wav.getsampwidth(), wav.getframerate())
+        play_obj.wait_done()
+
+    return play
+
+
+def get_command_player():
+    """Return a function that plays WAV bytes with a command-line player, or None if none is installed."""
+    command = next((command for command in COMMAND_PLAYERS if shutil.which(command[0])), None)
+    if command is None:
+        return None
+
+    def play(audio_data):
+        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as audio_file:
+            audio_file.write(audio_data)
+        try:
+            subprocess.run(command + [audio_file.name], check=False)
+        finally:
+            os.remove(audio_file.name)
+
+    return play
+
+
+class AudioCache:
+    """Rendered speech stored as WAV files on disk, keyed by (voice, volume, text)."""
+
+    PRUNE_EVERY = 100
+
+    def __init__(self, directory=AUDIO_CACHE_DIR, max_entries=5000):
+        self.directory = directory
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._writes_since_prune = 0
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, voice, volume, text):
+        return os.path.join(self.directory, make_cache_key(voice, volume, text) + ".wav")
+
+    def get(self, voice, volume, text):
+        """Return the cached audio bytes, or None on a miss."""
+        path = self._path(voice, volume, text)
+        try:
+            with open(path, "rb") as audio_file:
+                audio_data = audio_file.read()
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        try:
+            os.utime(path)  # The modification time marks the last use, for pruning
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return audio_data
+
+    def put(self, voice, volume, text, audio_data):
+        path = self._path(voice, volume, text)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as audio_file:
+            audio_file.write(audio_data)
+        os.replace(temp_path, path)
+        with self._lock:
+            self._writes_since_prune += 1
+            if self._writes_since_prune >= self.PRUNE_EVERY:
+                self._writes_since_prune = 0
+                self._prune()
+
+    def _prune(self):
+        """Delete the least recently used clips above the size cap."""
+        entries = [entry for entry in os.scandir(self.directory) if entry.name.endswith(".wav")]
+        excess = len(entries) - self.max_entries
+        if excess <= 0:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[:excess]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+
+class AzureSynthesizer:
+    """A reusable Azure synthesizer for one voice that renders speech to WAV bytes."""
+
+    def __init__(self, speech_config, voice):
+        self.voice = voice
+        speech_config.set_speech_synthesis_output_format(
+            speech_sdk.SpeechSynthesisOutputFormat.Riff24Khz16BitMonoPcm
+        )
+        speech_config.speech_synthesis_voice_name = voice
+        # audio_config=None keeps the audio in memory so it can be cached
+        self._synthesizer = speech_sdk.SpeechSynthesizer(speech_config=speech_config, audio_config=None)
+        self._speaker = None
+
+    def synthesize(self, text, volume=None):
+        result = self._synthesizer.speak_ssml_async(build_ssml(text, self.voice, volume)).get()
+        if result.reason != speech_sdk.ResultReason.SynthesizingAudioCompleted:
+            details = result.cancellation_details if result.reason == speech_sdk.ResultReason.Canceled else result.reason
+            raise RuntimeError(f"Speech synthesis failed: {details}")
+        return result.audio_data
+
+    def speak(self, text, volume=None, speech_config=None):
+        """Speak straight to the default speaker; used when no local player is available."""
+        if self._speaker is None:
+            self._speaker = speech_sdk.SpeechSynthesizer(speech_config=speech_config)
+        self._speaker.speak_ssml_async(build_ssml(text, self.voice, volume)).get()
+
+
+class FakeSynthesizer:
+    """Local stand-in for AzureSynthesizer that renders silent WAV clips and records calls."""
+
+    def __init__(self, voice, sample_rate=16000, seconds_per_char=0.01, latency=0.0):
+        self.voice = voice
+        self.sample_rate = sample_rate
+        self.seconds_per_char = seconds_per_char
+        self.latency = latency  # Simulated service round trip, in seconds
+        self.calls = []
+
+    def synthesize(self, text, volume=None):
+        self.calls.append((text, volume))
+        time.sleep(self.latency)
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(self.sample_rate)
+            wav.writeframes(b"\x00\x00" * int(len(text) * self.seconds_per_char * self.sample_rate))
+        return buffer.getvalue()
+
+    def speak(self, text, volume=None, speech_config=None):
+        self.synthesize(text, volume)
+
+
+class SynthesizerPool:
+    """
+    Keeps one reusable synthesizer per voice and serves repeated phrases from the
+    audio cache instead of synthesizing them again.
+
+    `synthesizer_factory(voice)` builds a synthesizer (AzureSynthesizer in production,
+    FakeSynthesizer in tests); `player(audio_data)` plays WAV bytes locally.
+    """
+
+    def __init__(self, synthesizer_factory, player=None, audio_cache=None, speech_config=None):
+        self.synthesizer_factory = synthesizer_factory
+        self.player = player
+        self.audio_cache = audio_cache
+        self.speech_config = speech_config
+        self._synthesizers = {}
+        self._voice_locks = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_speech_config(cls, speech_config, audio_cache_dir=AUDIO_CACHE_DIR, playback=True):
+        """
+        Build a pool of Azure synthesizers that share the subscription of `speech_config`.
+        With `playback=False` (headless servers) the pool only renders and caches audio.
+        """
+        def factory(voice):
+            voice_config = speech_sdk.SpeechConfig(
+                subscription=speech_config.subscription_key, region=speech_config.region
+            )
+            return AzureSynthesizer(voice_config, voice)
+
+        if not playback:
+            return cls(factory, audio_cache=AudioCache(audio_cache_dir), speech_config=speech_config)
+
+        player = get_default_player()
+        if player is None:
+            print("No local audio player found (install simpleaudio or aplay); speech will not be cached.")
+        audio_cache = AudioCache(audio_cache_dir) if player is not None else None
+        return cls(factory, player=player, audio_cache=audio_cache, speech_config=speech_config)
+
+    def get(self, voice):
+        """Return the shared synthesizer for a voice and the lock that serializes its use."""
+        with self._lock:
+            if voice not in self._synthesizers:
+                self._synthesizers[voice] = self.synthesizer_factory(voice)
+                self._voice_locks[voice] = threading.Lock()
+            return self._synthesizers[voice], self._voice_locks[voice]
+
+    def synthesize(self, text, voice, volume=None):
+        """Return WAV bytes for the text, from the audio cache when possible."""
+        if self.audio_cache is not None:
+            audio_data = self.audio_cache.get(voice, volume, text)
+            if audio_data is not None:
+                metrics.increment("audio_cache_hits")
+                return audio_data
+
+        synthesizer, voice_lock = self.get(voice)
+        with voice_lock, metrics.time("synthesis"):
+            audio_data = synthesizer.synthesize(text, volume)
+        if self.audio_cache is not None:
+            self.audio_cache.put(voice, volume, text, audio_data)
+        return audio_data
+
+    def speak(self, text, voice, volume=None):
+        """Synthesize (or fetch from cache) and play the text, blocking until playback ends."""
+        if self.player is None:
+            synthesizer, voice_lock = self.get(voice)
+            with voice_lock, metrics.time("synthesis"):
+                synthesizer.speak(text, volume, self.speech_config)
+            return
+        audio_data = self.synthesize(text, voice, volume)
+        with metrics.time("playback"):
+            self.player(audio_data)
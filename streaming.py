@@ -0,0 +1,148 @@
+import queue
+import re
+import threading
+from translation import VOICES, translate_text
+
+# A sentence ends at . ! or ? (optionally followed by closing quotes/brackets) and whitespace
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])[\"')\]]*\s+")
+
+_DONE = object()
+
+
+class _Failure:
+    def __init__(self, error):
+        self.error = error
+
+
+class ProgressivePrinter:
+    """Prints a reply piece by piece after a label; the label appears with the first piece."""
+
+    def __init__(self, label):
+        self.label = label
+        self.started = False
+
+    def __call__(self, text):
+        if not self.started:
+            print(self.label, end="")
+            self.started = True
+        print(text, end="", flush=True)
+
+    def echo(self, chunks):
+        """Print each chunk as it passes through."""
+        for chunk in chunks:
+            self(chunk)
+            yield chunk
+
+    def finish(self):
+        if self.started:
+            print()
+
+
+def split_sentences(chunks):
+    """Yield complete sentences from an iterable of text chunks as soon as each one ends."""
+    buffer = ""
+    for chunk in chunks:
+        buffer += chunk
+        parts = SENTENCE_BOUNDARY.split(buffer)
+        for sentence in parts[:-1]:
+            if sentence.strip():
+                yield sentence.strip()
+        buffer = parts[-1]
+    if buffer.strip():
+        yield buffer.strip()
+
+
+def _run_stage(source, target, work):
+    """Apply `work` to each item from `source` and pass results on, forwarding failures."""
+    while True:
+        item = source.get()
+        if item is _DONE or isinstance(item, _Failure):
+            target.put(item)
+            return
+        try:
+            target.put(work(item))
+        except Exception as e:
+            target.put(_Failure(e))
+            # Drain the rest so upstream stages can finish
+            while item is not _DONE and not isinstance(item, _Failure):
+                item = source.get()
+            return
+
+
+def stream_speech(chunks, translate, render, play, on_sentence=None):
+    """
+    Run generation, translation, synthesis and playback as overlapping stages.
+
+    `chunks` yields generated text (a whole answer or partial pieces); it is split into
+    sentences, and each sentence is translated and rendered in background threads while
+    the calling thread plays earlier sentences in order. `on_sentence(text)` is called
+    with each translated sentence just before it is played. Returns the translated
+    sentences; the first error from any stage is re-raised.
+    """
+    sentences = queue.Queue()
+    translated = queue.Queue()
+    rendered = queue.Queue()
+
+    def produce():
+        try:
+            for sentence in split_sentences(chunks):
+                sentences.put(sentence)
+        except Exception as e:
+            sentences.put(_Failure(e))
+            return
+        sentences.put(_DONE)
+
+    threads = [
+        threading.Thread(target=produce, name="turn-generate", daemon=True),
+        threading.Thread(target=_run_stage, args=(sentences, translated, translate), name="turn-translate", daemon=True),
+        threading.Thread(
+            target=_run_stage, args=(translated, rendered, lambda text: (text, render(text))),
+            name="turn-synthesize", daemon=True,
+        ),
+    ]
+    for thread in threads:
+        thread.start()
+
+    spoken = []
+    failure = None
+    while True:
+        item = rendered.get()
+        if item is _DONE:
+            break
+        if isinstance(item, _Failure):
+            failure = item.error
+            break
+        text, audio = item
+        if on_sentence is not None:
+            on_sentence(text)
+        play(audio)
+        spoken.append(text)
+
+    for thread in threads:
+        thread.join()
+    if failure is not None:
+        raise failure
+    return spoken
+
+
+def speak_streaming(chunks, language, synthesizer_pool, volume=None, on_sentence=None):
+    """
+    Translate and speak generated text sentence by sentence through a SynthesizerPool,
+    so the first sentence plays while later ones are still being produced.
+    Returns the full (translated) reply.
+    """
+    voice = VOICES.get(language, VOICES["en"])[0]
+    if language != "en":
+        translate = lambda text: translate_text(text, language)
+    else:
+        translate = lambda text: text
+
+    if synthesizer_pool.player is not None:
+        render = lambda text: synthesizer_pool.synthesize(text, voice, volume)
+        play = synthesizer_pool.player
+    else:
+        # No local player: the pool speaks directly, so rendering happens at play time
+        render = lambda text: text
+        play = lambda text: synthesizer_pool.speak(text, voice, volume)
+
+    return " ".join(stream_speech(chunks, translate, render, play, on_sentence))
@@ -0,0 +1,7 @@
+import os
+import sys
+import tempfile
+
+# Tests import the flat modules from the repository root and never touch the real caches
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("CHATBOT_CACHE_DIR", tempfile.mkdtemp(prefix="chatbot-tests-"))
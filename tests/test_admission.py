@@ -0,0 +1,77 @@
+import threading
+import time
+from concurrent.futures import Future
+import pytest
+from admission import AdmissionController, Overloaded
+
+
+def test_sheds_when_the_queue_is_full():
+    controller = AdmissionController(max_concurrent=1, max_queue=0, deadline_seconds=5)
+    controller.acquire()
+    with pytest.raises(Overloaded) as shed:
+        controller.acquire()
+    assert shed.value.reason == "queue_full"
+    assert controller.stats()["shed_queue_full"] == 1
+    controller.release()
+    controller.acquire()  # The freed slot is available again
+    controller.release()
+
+
+def test_sheds_when_no_slot_frees_up_within_the_deadline():
+    controller = AdmissionController(max_concurrent=1, max_queue=1, deadline_seconds=0.05)
+    controller.acquire()
+    started = time.monotonic()
+    with pytest.raises(Overloaded) as shed:
+        controller.acquire()
+    assert shed.value.reason == "deadline"
+    assert time.monotonic() - started < 1
+    assert controller.stats()["waiting"] == 0
+    controller.release()
+
+
+def test_spent_deadline_is_shed_immediately():
+    controller = AdmissionController(max_concurrent=4, max_queue=4, deadline_seconds=10)
+    with pytest.raises(Overloaded) as shed:
+        controller.acquire(deadline_seconds=-0.5)
+    assert shed.value.reason == "deadline"
+    assert controller.stats()["in_flight"] == 0
+
+
+def test_waiter_is_admitted_when_a_slot_is_released():
+    controller = AdmissionController(max_concurrent=1, max_queue=1, deadline_seconds=5)
+    controller.acquire()
+    admitted = threading.Event()
+
+    def wait_for_slot():
+        controller.acquire()
+        admitted.set()
+
+    thread = threading.Thread(target=wait_for_slot)
+    thread.start()
+    time.sleep(0.05)
+    assert not admitted.is_set()
+    controller.release()
+    thread.join(5)
+    assert admitted.is_set()
+    assert controller.stats()["in_flight"] == 1
+
+
+def test_run_sheds_slow_requests_but_keeps_their_slot_until_they_finish():
+    controller = AdmissionController(max_concurrent=1, max_queue=0, deadline_seconds=0.05)
+    future = Future()
+    with pytest.raises(Overloaded) as shed:
+        controller.run(lambda: future)
+    assert shed.value.reason == "deadline"
+    assert controller.stats()["in_flight"] == 1  # Still generating
+
+    future.set_result("late answer")
+    assert controller.stats()["in_flight"] == 0
+
+
+def test_run_returns_the_result():
+    controller = AdmissionController(max_concurrent=2, max_queue=2, deadline_seconds=5)
+    future = Future()
+    future.set_result("answer")
+    assert controller.run(lambda: future) == "answer"
+    assert controller.stats()["admitted"] == 1
+    assert controller.stats()["in_flight"] == 0
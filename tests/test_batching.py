@@ -0,0 +1,94 @@
+import threading
+import time
+import pytest
+from batching import MicroBatchScheduler
+
+
+def test_outputs_match_inputs_across_batches():
+    batches = []
+
+    def run_batch(items):
+        batches.append(list(items))
+        time.sleep(0.01)
+        return [item * 10 for item in items]
+
+    scheduler = MicroBatchScheduler(run_batch, max_batch_size=4, max_wait_ms=50)
+    futures = [scheduler.submit(item) for item in range(10)]
+    assert [future.result(5) for future in futures] == [item * 10 for item in range(10)]
+    assert max(len(batch) for batch in batches) == 4
+    assert len(batches) < 10  # Concurrent submissions were batched
+    assert sorted(item for batch in batches for item in batch) == list(range(10))
+    scheduler.close()
+
+
+def test_concurrent_callers_get_their_own_outputs():
+    scheduler = MicroBatchScheduler(lambda items: [f"answer to {item}" for item in items], max_wait_ms=20)
+    results = {}
+
+    def ask(item):
+        results[item] = scheduler(item, timeout=5)
+
+    threads = [threading.Thread(target=ask, args=(f"q{item}",)) for item in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == {f"q{item}": f"answer to q{item}" for item in range(16)}
+    scheduler.close()
+
+
+def test_errors_reach_every_caller_in_the_batch():
+    calls = []
+
+    def run_batch(items):
+        calls.append(items)
+        if len(calls) == 1:
+            raise ValueError("model failed")
+        return list(items)
+
+    scheduler = MicroBatchScheduler(run_batch, max_batch_size=8, max_wait_ms=50)
+    failed = [scheduler.submit(item) for item in ("a", "b", "c")]
+    for future in failed:
+        with pytest.raises(ValueError, match="model failed"):
+            future.result(5)
+    assert scheduler("d", timeout=5) == "d"  # The worker keeps serving after a failed batch
+    scheduler.close()
+
+
+def test_wrong_output_count_is_an_error():
+    scheduler = MicroBatchScheduler(lambda items: items[:-1], max_batch_size=2, max_wait_ms=50)
+    futures = [scheduler.submit(item) for item in (1, 2)]
+    for future in futures:
+        with pytest.raises(RuntimeError, match="1 outputs for 2 inputs"):
+            future.result(5)
+    scheduler.close()
+
+
+def test_cancelled_requests_are_skipped():
+    started = threading.Event()
+    release = threading.Event()
+    seen = []
+
+    def run_batch(items):
+        seen.extend(items)
+        started.set()
+        release.wait(5)
+        return list(items)
+
+    scheduler = MicroBatchScheduler(run_batch, max_batch_size=1, max_wait_ms=0)
+    first = scheduler.submit("first")
+    started.wait(5)
+    cancelled = scheduler.submit("cancelled")
+    assert cancelled.cancel()
+    release.set()
+    assert first.result(5) == "first"
+    assert scheduler("last", timeout=5) == "last"
+    assert seen == ["first", "last"]
+    scheduler.close()
+
+
+def test_submit_after_close_fails():
+    scheduler = MicroBatchScheduler(lambda items: items)
+    scheduler.close()
+    with pytest.raises(RuntimeError):
+        scheduler.submit("late")
@@ -0,0 +1,59 @@
+import pytest
+from faq_index import FAQIndex, MultilingualFAQIndex, words_match
+
+
+@pytest.fixture(scope="module")
+def faq_index():
+    return FAQIndex.from_file()
+
+
+@pytest.mark.parametrize("question, expected", [
+    ("how do i track my order", "how can i track my order"),
+    ("can i cancel my order", "how do i cancel my order"),
+    ("I forgot my password!", "what if i forgot my password"),
+    ("What's your return policy?", "what is your return policy"),
+    ("are there any discounts available", "are there any discounts available right now"),
+    ("how can i trak my order", "how can i track my order"),
+])
+def test_matches_rewordings_and_typos(faq_index, question, expected):
+    result = faq_index.match(question)
+    assert result is not None and result[0] == expected
+
+
+@pytest.mark.parametrize("question", [
+    # Near misses: most of the wording matches an entry, but the word that matters does not
+    "do you offer international returns",
+    "how do i cancel my gift card",
+    "what if i forgot my username",
+    "is there a warranty on gift cards",
+    "can i track my refund",
+    "how long does a refund take",
+    "what is your privacy policy",
+    "can i cancel my subscription",
+    "can i pay with crypto",
+])
+def test_near_misses_go_to_the_model(faq_index, question):
+    assert faq_index.match(question) is None
+
+
+def test_words_match_inflections_and_typos():
+    assert words_match("ship", "shipping")
+    assert words_match("pakage", "package")
+    assert not words_match("username", "password")
+    assert not words_match("returns", "shipping")
+
+
+def test_large_index_finds_the_right_entry():
+    entries = [(f"how do i configure product model {number} for my home", f"answer {number}") for number in range(5000)]
+    entries.append(("how do i cancel my order", "cancel answer"))
+    index = FAQIndex(entries)
+    # Thousands of near-identical questions flatten the scores, but the best entry still ranks first
+    assert index.match("how can i cancel my order", threshold=0)[1] == "cancel answer"
+    assert index.match("how do i configure product model 4321 for my house", threshold=0)[1] == "answer 4321"
+
+
+def test_localized_lookup_returns_the_localized_answer():
+    index = MultilingualFAQIndex([("how can i track my order", "Track it in My Orders.")])
+    index.add_language("es", ["¿cómo puedo rastrear mi pedido?"], ["Rastréelo en Mis pedidos."])
+    assert index.lookup_localized("cómo puedo rastrear mi pedido", "es") == ("Rastréelo en Mis pedidos.", "es")
+    assert index.lookup_localized("how can i track my order", "hi") == ("Track it in My Orders.", "en")
@@ -0,0 +1,50 @@
+import os
+import pytest
+
+QUESTIONS = [
+    "What is your return policy?",
+    "How do I track my order?",
+    "Can I change the delivery address after my order has already been shipped to the warehouse?",
+    "Do you ship internationally?",
+]
+
+
+@pytest.fixture(scope="module")
+def qa_pipeline():
+    pytest.importorskip("torch")
+    pytest.importorskip("transformers")
+    from model_registry import build_pipeline
+
+    # A small model keeps the test quick; QA_TEST_MODEL can point it at the production model
+    try:
+        return build_pipeline(os.getenv("QA_TEST_MODEL", "google/flan-t5-small"))
+    except OSError as e:
+        pytest.skip(f"Model not available: {e}")
+
+
+def test_greedy_decoding_is_configured():
+    from generation import GENERATION_KWARGS
+
+    assert GENERATION_KWARGS["do_sample"] is False
+
+
+def test_batched_answers_match_one_at_a_time_answers(qa_pipeline):
+    from generation import run_generation
+
+    one_at_a_time = [run_generation(qa_pipeline, [question])[0] for question in QUESTIONS]
+    # Questions of different lengths are padded together in one generate call
+    assert run_generation(qa_pipeline, QUESTIONS) == one_at_a_time
+    assert run_generation(qa_pipeline, list(reversed(QUESTIONS))) == list(reversed(one_at_a_time))
+
+
+def test_generated_answers_are_cached_and_counted_once(monkeypatch):
+    import generation
+
+    monkeypatch.setattr(generation.qa_scheduler, "run_batch", lambda questions: [f"A: {q}" for q in questions])
+    before = generation.answer_cache.stats()
+    question = "How do cache counters work for a brand new question?"
+    assert generation.generate_answer(question) == f"A: {question}"
+    assert generation.generate_answer(question) == f"A: {question}"
+    after = generation.answer_cache.stats()
+    assert after["misses"] - before["misses"] == 1
+    assert after["hits"] - before["hits"] == 1
@@ -0,0 +1,66 @@
+import json
+import pytest
+from intent_router import IntentRouter
+
+
+@pytest.fixture(scope="module")
+def router():
+    return IntentRouter()
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("quit", ("quit", None)),
+    ("Quit please", ("quit", None)),
+    ("ok bye", ("quit", None)),
+    ("hi", ("greeting", None)),
+    ("Hi there!", ("greeting", None)),
+    ("good morning", ("greeting", None)),
+    ("switch to Hindi", ("language", "hi")),
+    ("hindi please", ("language", "hi")),
+    ("reply in español", ("language", "es")),
+    ("change language to fr", ("language", "fr")),
+    ("volume 60", ("volume", 60)),
+    ("set the volume to 30 percent", ("volume", 30)),
+    ("louder please", ("volume", "up")),
+    ("mute", ("volume", "mute")),
+    ("help", ("help", None)),
+    ("what can I ask?", ("help", None)),
+])
+def test_routes_control_utterances(router, text, expected):
+    assert router.route(text) == expected
+
+
+@pytest.mark.parametrize("text", [
+    "hi, how do I track my order",
+    "help me track my order",
+    "how do I stop my subscription",
+    "switch to klingon",
+    "volume",
+    "what is the volume of the box",
+    "",
+])
+def test_leaves_questions_alone(router, text):
+    assert router.route(text) is None
+
+
+def test_config_adds_phrases_and_fixed_replies(tmp_path):
+    path = tmp_path / "intents.json"
+    path.write_text(json.dumps({
+        "quit": ["cya"],
+        "hours": {"phrases": ["opening hours"], "reply": "We are open 9 to 6."},
+    }))
+    router = IntentRouter.from_config(str(path))
+    assert router.route("cya") == ("quit", None)
+    assert router.route("opening hours please") == ("hours", "We are open 9 to 6.")
+
+
+@pytest.mark.parametrize("config", [
+    {"hours": ["opening hours"]},
+    {"hours": {"phrases": ["opening hours"]}},
+    {"quit": {"phrases": ["cya"], "reply": "Bye"}},
+])
+def test_config_rejects_intents_without_a_usable_reply(tmp_path, config):
+    path = tmp_path / "intents.json"
+    path.write_text(json.dumps(config))
+    with pytest.raises(ValueError):
+        IntentRouter.from_config(str(path))
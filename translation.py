@@ -1,7 +1,46 @@
 from dotenv import load_dotenv
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import azure.cognitiveservices.speech as speech_sdk
-from googletrans import Translator
+from cache import CACHE_DIR, PersistentCache, make_cache_key
+from metrics import metrics
+from speech_pool import SynthesizerPool
+from translation_backends import build_translation_backend
+
+# Supported response languages: code -> (Azure neural voice, display name)
+VOICES = {
+    "en": ("en-US-AriaNeural", "English"),
+    "hi": ("hi-IN-MadhurNeural", "Hindi"),
+    "mr": ("mr-IN-AarohiNeural", "Marathi"),
+    "fr": ("fr-FR-HenriNeural", "French"),
+    "es": ("es-ES-ElviraNeural", "Spanish"),
+    "ja": ("ja-JP-NanamiNeural", "Japanese"),
+    "ko": ("ko-KR-SunHiNeural", "Korean")
+}
+
+# Target languages for run_translation_tool; override with a comma-separated TRANSLATION_TARGETS
+DEFAULT_TRANSLATION_TARGETS = ["fr", "es", "hi", "ja", "ko"]
+
+# Translations never go stale, so the cache only has a size cap
+translation_cache = PersistentCache(
+    os.getenv("TRANSLATION_CACHE_PATH", os.path.join(CACHE_DIR, "translations.sqlite")),
+    max_entries=int(os.getenv("TRANSLATION_CACHE_MAX_ENTRIES", "20000")),
+    max_disk_entries=int(os.getenv("TRANSLATION_CACHE_MAX_DISK_ENTRIES", "500000")),
+)
+
+_translation_backend = None
+_translation_backend_lock = threading.Lock()
+_speech_recognizer = None
+_speech_recognizer_lock = threading.Lock()
+_synthesizer_pool = None
+_synthesizer_pool_lock = threading.Lock()
+_speech_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("SPEECH_MAX_WORKERS", "5")), thread_name_prefix="synthesize"
+)
+_translation_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("TRANSLATION_MAX_WORKERS", "8")), thread_name_prefix="translate"
+)
 
 def load_speech_config():
     """Load Azure Speech SDK configuration from environment variables."""
@@ -16,26 +55,110 @@ def load_speech_config():
     return speech_config
 
 
-def translate_text(text, target_language):
+def get_translation_backend():
+    """
+    Return the translation backend shared by all callers, chosen by TRANSLATION_BACKEND:
+    "google" (default), "marian" or "nllb", or a fallback chain such as "marian,google".
+    """
+    global _translation_backend
+    if _translation_backend is None:
+        with _translation_backend_lock:
+            if _translation_backend is None:
+                _translation_backend = build_translation_backend(os.getenv("TRANSLATION_BACKEND", "google"))
+    return _translation_backend
+
+
+def translation_cache_key(text, target_language):
+    """Cache key for a translation; backends translate differently, so the backend is part of it."""
+    return make_cache_key(text, target_language, get_translation_backend().name)
+
+
+def _translate_uncached(texts, target_language, fallback_to_source=True):
     """
-    Translate the input text into the target language using Google Translate.
+    Translate one batch of texts and cache the results. If the backend fails, the
+    untranslated texts are returned (and not cached) so an error is never spoken, or
+    None for each text when `fallback_to_source` is False.
     """
-    translator = Translator()
     try:
-        translated = translator.translate(text, dest=target_language)
-        return translated.text
+        translated = get_translation_backend().translate(texts, target_language)
     except Exception as e:
-        return f"Error in translation: {e}"
+        print(f"Error in translation to {target_language}: {e}")
+        metrics.increment("translation_errors")
+        return list(texts) if fallback_to_source else [None] * len(texts)
+    for text, translation in zip(texts, translated):
+        translation_cache.put(translation_cache_key(text, target_language), translation)
+    return translated
 
 
+@metrics.timed("translation")
+def translate_batch(texts, target_languages, fallback_to_source=True):
+    """
+    Translate a list of texts into one or more target languages.
+
+    Identical inputs are translated once and cached pairs are served from the translation
+    cache. The rest are split per language into batches of the backend's
+    `max_batch_size` (one text for Google, many for local models), and the batches run
+    concurrently. Returns a dict mapping each target language to the translations, in
+    input order. Failed translations are the source text, or None when
+    `fallback_to_source` is False.
+    """
+    unique_texts = list(dict.fromkeys(texts))
+    batch_size = get_translation_backend().max_batch_size
+    translations = {}
+    batches = []
+    for target_language in dict.fromkeys(target_languages):
+        pending = []
+        for text in unique_texts:
+            cached = translation_cache.get(translation_cache_key(text, target_language))
+            if cached is not None:
+                translations[(text, target_language)] = cached
+            else:
+                pending.append(text)
+        batches.extend((pending[i:i + batch_size], target_language) for i in range(0, len(pending), batch_size))
+
+    if len(batches) == 1:
+        results = [_translate_uncached(*batches[0], fallback_to_source)]
+    else:
+        futures = [_translation_executor.submit(_translate_uncached, *batch, fallback_to_source) for batch in batches]
+        results = [future.result() for future in futures]
+    for (batch_texts, target_language), translated in zip(batches, results):
+        for text, translation in zip(batch_texts, translated):
+            translations[(text, target_language)] = translation
+
+    return {
+        target_language: [translations[(text, target_language)] for text in texts]
+        for target_language in target_languages
+    }
+
+
+def translate_text(text, target_language):
+    """
+    Translate the input text into the target language with the configured backend.
+    Results are memoized per (text, target_language) in memory and on disk.
+    """
+    return translate_batch([text], [target_language])[target_language][0]
+
+
+def get_speech_recognizer():
+    """Return the microphone recognizer shared by recognize_speech calls, built on first use."""
+    global _speech_recognizer
+    if _speech_recognizer is None:
+        with _speech_recognizer_lock:
+            if _speech_recognizer is None:
+                audio_config = speech_sdk.AudioConfig(use_default_microphone=True)
+                _speech_recognizer = speech_sdk.SpeechRecognizer(
+                    speech_config=load_speech_config(), audio_config=audio_config
+                )
+    return _speech_recognizer
+
+
+@metrics.timed("recognition")
 def recognize_speech():
     """
     Recognize speech input using Azure Cognitive Services.
     """
     try:
-        speech_config = load_speech_config()
-        audio_config = speech_sdk.AudioConfig(use_default_microphone=True)
-        recognizer = speech_sdk.SpeechRecognizer(speech_config=speech_config, audio_config=audio_config)
+        recognizer = get_speech_recognizer()
 
         print("Listening... (Say 'quit' to exit speak mode)")
         result = recognizer.recognize_once_async().get()
@@ -53,36 +176,63 @@ def recognize_speech():
         return None
 
 
+def get_synthesizer_pool():
+    """Return the synthesizer pool shared by text_to_speech calls, built on first use."""
+    global _synthesizer_pool
+    if _synthesizer_pool is None:
+        with _synthesizer_pool_lock:
+            if _synthesizer_pool is None:
+                _synthesizer_pool = SynthesizerPool.from_speech_config(load_speech_config())
+    return _synthesizer_pool
+
+
 def text_to_speech(text, language_code="en"):
     """
     Synthesize speech from text using Azure Cognitive Services.
     """
     try:
-        speech_config = load_speech_config()
-        voices = {
-            "en": "en-US-AriaNeural",
-            "fr": "fr-FR-HenriNeural",
-            "es": "es-ES-ElviraNeural",
-            "hi": "hi-IN-MadhurNeural",
-            "ja": "ja-JP-NanamiNeural",
-            "ko": "ko-KR-SunHiNeural",
-        }
-
-        if language_code in voices:
-            speech_config.speech_synthesis_voice_name = voices[language_code]
-        else:
-            speech_config.speech_synthesis_voice_name = voices["en"]
-
-        synthesizer = speech_sdk.SpeechSynthesizer(speech_config=speech_config)
-        synthesizer.speak_text_async(text).get()
+        voice = VOICES.get(language_code, VOICES["en"])[0]
+        get_synthesizer_pool().speak(text, voice)
 
     except Exception as e:
         print(f"Error in text-to-speech synthesis: {e}")
 
 
-def run_translation_tool():
+def synthesize_translations(translations, in_order=True):
+    """
+    Synthesize several translations concurrently on the shared synthesizer pool.
+
+    `translations` maps language codes to text. Yields (language, text, audio) tuples in
+    the input order, or as each synthesis finishes when `in_order` is False, so total
+    latency is close to the slowest single synthesis rather than the sum.
+    """
+    pool = get_synthesizer_pool()
+    futures = {}
+    for lang, translation in translations.items():
+        voice = VOICES.get(lang, VOICES["en"])[0]
+        futures[_speech_executor.submit(pool.synthesize, translation, voice)] = (lang, translation)
+
+    for future in (futures if in_order else as_completed(futures)):
+        lang, translation = futures[future]
+        try:
+            yield lang, translation, future.result()
+        except Exception as e:
+            print(f"Error in text-to-speech synthesis ({lang}): {e}")
+
+
+def get_translation_targets():
+    """Read the target languages for run_translation_tool from TRANSLATION_TARGETS."""
+    targets = os.getenv("TRANSLATION_TARGETS")
+    if not targets:
+        return list(DEFAULT_TRANSLATION_TARGETS)
+    return [code.strip() for code in targets.split(",") if code.strip()]
+
+
+def run_translation_tool(target_languages=None, in_order=True):
     """
     A standalone function to translate speech-to-speech between languages.
+    Speech for all target languages is synthesized in parallel, then played in order
+    (or as each clip is ready when `in_order` is False).
     """
     try:
         speech_config = load_speech_config()
@@ -92,15 +242,16 @@ def run_translation_tool():
             subscription=speech_config.subscription_key, region=speech_config.region
         )
         translation_config.speech_recognition_language = "en-US"
-        translation_config.add_target_language("fr")
-        translation_config.add_target_language("es")
-        translation_config.add_target_language("hi")
-        translation_config.add_target_language("ja")
-        translation_config.add_target_language("ko")
+        for lang in target_languages or get_translation_targets():
+            translation_config.add_target_language(lang)
 
         # Configure audio input
         audio_config = speech_sdk.AudioConfig(use_default_microphone=True)
         translator = speech_sdk.translation.TranslationRecognizer(translation_config, audio_config=audio_config)
+        pool = get_synthesizer_pool()
+        if pool.player is None:
+            print("No local audio player found (install simpleaudio or aplay); "
+                  "translations will be synthesized one at a time.")
 
         print("Ready to translate. Speak now... (Say 'quit' to exit)")
         while True:
@@ -108,9 +259,16 @@ def run_translation_tool():
 
             if result.reason == speech_sdk.ResultReason.TranslatedSpeech:
                 print(f"Original: {result.text}")
-                for lang, translation in result.translations.items():
+                translations = dict(result.translations.items())
+                if pool.player is None:
+                    # No local player for rendered clips: speak each translation directly, serially
+                    for lang, translation in translations.items():
+                        print(f"Translated ({lang}): {translation}")
+                        text_to_speech(translation, lang)
+                    continue
+                for lang, translation, audio in synthesize_translations(translations, in_order):
                     print(f"Translated ({lang}): {translation}")
-                    text_to_speech(translation, lang)
+                    pool.player(audio)
             elif result.reason == speech_sdk.ResultReason.RecognizedSpeech:
                 print(f"Recognized: {result.text}")
             elif result.reason == speech_sdk.ResultReason.NoMatch:
@@ -119,4 +277,4 @@ def run_translation_tool():
                 print(f"Speech recognition error: {result.reason}")
 
     except Exception as e:
-        print(f"An error occurred: {e}")
\ No newline at end of file
+        print(f"An error occurred: {e}")
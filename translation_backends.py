@@ -0,0 +1,199 @@
+import threading
+from abc import ABC, abstractmethod
+
+# MarianMT checkpoints per response language (English source); loaded on first use
+MARIAN_MODELS = {
+    "hi": "Helsinki-NLP/opus-mt-en-hi",
+    "mr": "Helsinki-NLP/opus-mt-en-mr",
+    "fr": "Helsinki-NLP/opus-mt-en-fr",
+    "es": "Helsinki-NLP/opus-mt-en-es",
+    "ja": "Helsinki-NLP/opus-mt-en-jap",
+    "ko": "Helsinki-NLP/opus-mt-tc-big-en-ko",
+}
+
+# One NLLB-200 model covers every response language; codes are FLORES-200 names
+NLLB_MODEL_NAME = "facebook/nllb-200-distilled-600M"
+NLLB_LANGUAGE_CODES = {
+    "en": "eng_Latn",
+    "hi": "hin_Deva",
+    "mr": "mar_Deva",
+    "fr": "fra_Latn",
+    "es": "spa_Latn",
+    "ja": "jpn_Jpan",
+    "ko": "kor_Hang",
+}
+
+# Greedy decoding keeps CPU latency low; replies are short customer-care sentences
+LOCAL_GENERATION_KWARGS = {"max_new_tokens": 256, "num_beams": 1}
+
+
+class GoogleTransBackend:
+    """Translates through the googletrans web client, one request per text."""
+
+    name = "google"
+    max_batch_size = 1  # Each text is a separate network call; callers run them concurrently
+
+    def __init__(self, translator=None):
+        self._translator = translator
+        self._lock = threading.Lock()
+
+    def get_translator(self):
+        """Return the long-lived Google Translate client, created on first use."""
+        if self._translator is None:
+            with self._lock:
+                if self._translator is None:
+                    from googletrans import Translator  # Only needed when this backend is selected
+                    self._translator = Translator()
+        return self._translator
+
+    def supports(self, target_language):
+        return True
+
+    def translate(self, texts, target_language):
+        translator = self.get_translator()
+        return [translator.translate(text, dest=target_language).text for text in texts]
+
+
+class LocalModelBackend(ABC):
+    """
+    Base class for offline seq2seq translation models running on the CPU.
+
+    Models are loaded lazily, the first time a language is requested, and each call
+    translates a whole batch of texts in one padded `generate` call.
+    """
+
+    name = "local"
+    max_batch_size = 16
+
+    def __init__(self, max_batch_size=None):
+        if max_batch_size:
+            self.max_batch_size = max_batch_size
+        self._models = {}
+        self._model_locks = {}
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def supports(self, target_language):
+        """Whether a model is available for the target language."""
+
+    @abstractmethod
+    def model_name(self, target_language):
+        """The Hugging Face checkpoint that translates into the target language."""
+
+    def generate_kwargs(self, tokenizer, target_language):
+        return {}
+
+    def load(self, target_language):
+        """Return (tokenizer, model, lock) for the language, loading the model on first use."""
+        model_name = self.model_name(target_language)
+        with self._lock:
+            if model_name not in self._model_locks:
+                self._model_locks[model_name] = threading.Lock()
+            model_lock = self._model_locks[model_name]
+
+        with model_lock:
+            if model_name not in self._models:
+                from transformers import AutoModelForSeq2SeqLM, AutoTokenizer  # Deferred: heavy import
+
+                tokenizer = AutoTokenizer.from_pretrained(model_name, **self.tokenizer_kwargs())
+                model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
+                model.eval()
+                self._models[model_name] = (tokenizer, model)
+                print(f"Translation model ready: {model_name}")
+        return (*self._models[model_name], model_lock)
+
+    def tokenizer_kwargs(self):
+        return {}
+
+    def translate(self, texts, target_language):
+        if not self.supports(target_language):
+            raise ValueError(f"{self.name} backend does not support language '{target_language}'")
+        import torch
+
+        tokenizer, model, model_lock = self.load(target_language)
+        inputs = tokenizer(list(texts), return_tensors="pt", padding=True, truncation=True)
+        with model_lock, torch.inference_mode():
+            outputs = model.generate(
+                **inputs, **self.generate_kwargs(tokenizer, target_language), **LOCAL_GENERATION_KWARGS
+            )
+        return [text.strip() for text in tokenizer.batch_decode(outputs, skip_special_tokens=True)]
+
+
+class MarianBackend(LocalModelBackend):
+    """One small MarianMT model per target language."""
+
+    name = "marian"
+
+    def supports(self, target_language):
+        return target_language in MARIAN_MODELS
+
+    def model_name(self, target_language):
+        return MARIAN_MODELS[target_language]
+
+
+class NLLBBackend(LocalModelBackend):
+    """A single multilingual NLLB-200 model shared by every target language."""
+
+    name = "nllb"
+
+    def __init__(self, model_name=NLLB_MODEL_NAME, max_batch_size=None):
+        super().__init__(max_batch_size)
+        self._model_name = model_name
+
+    def supports(self, target_language):
+        return target_language in NLLB_LANGUAGE_CODES
+
+    def model_name(self, target_language):
+        return self._model_name
+
+    def tokenizer_kwargs(self):
+        return {"src_lang": NLLB_LANGUAGE_CODES["en"]}
+
+    def generate_kwargs(self, tokenizer, target_language):
+        return {"forced_bos_token_id": tokenizer.convert_tokens_to_ids(NLLB_LANGUAGE_CODES[target_language])}
+
+
+class ChainBackend:
+    """Tries each backend in order, moving on when one lacks the language or fails."""
+
+    def __init__(self, backends):
+        self.backends = list(backends)
+        self.name = ",".join(backend.name for backend in self.backends)
+        self.max_batch_size = self.backends[0].max_batch_size
+
+    def supports(self, target_language):
+        return any(backend.supports(target_language) for backend in self.backends)
+
+    def translate(self, texts, target_language):
+        error = ValueError(f"No translation backend supports language '{target_language}'")
+        for backend in self.backends:
+            if not backend.supports(target_language):
+                continue
+            try:
+                return backend.translate(texts, target_language)
+            except Exception as e:
+                print(f"Error in {backend.name} translation, trying the next backend: {e}")
+                error = e
+        raise error
+
+
+TRANSLATION_BACKENDS = {
+    "google": GoogleTransBackend,
+    "marian": MarianBackend,
+    "nllb": NLLBBackend,
+}
+
+
+def build_translation_backend(spec="google"):
+    """
+    Build a backend from a comma-separated list of backend names, e.g. "marian,google"
+    translates locally and falls back to Google Translate for anything Marian cannot do.
+    """
+    names = [name.strip().lower() for name in spec.split(",") if name.strip()] or ["google"]
+    unknown = [name for name in names if name not in TRANSLATION_BACKENDS]
+    if unknown:
+        raise ValueError(
+            f"Unknown translation backend '{unknown[0]}'. Choose from: {', '.join(TRANSLATION_BACKENDS)}"
+        )
+    backends = [TRANSLATION_BACKENDS[name]() for name in names]
+    return backends[0] if len(backends) == 1 else ChainBackend(backends)
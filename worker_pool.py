@@ -0,0 +1,298 @@
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+from concurrent.futures import Future
+
+
+def _worker_main(conn, shared_pipeline, load_pipeline, run_batch, num_threads, warmup_item):
+    """Worker process loop: answer ("run", items) and ("ping", None) messages until told to stop."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C is handled by the parent
+    try:
+        import torch
+        torch.set_num_threads(num_threads)
+    except ImportError:
+        pass
+
+    qa_pipeline = shared_pipeline if shared_pipeline is not None else load_pipeline()
+    if warmup_item is not None:
+        run_batch(qa_pipeline, [warmup_item])
+    conn.send(("ready", os.getpid()))
+
+    while True:
+        try:
+            kind, payload = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            return
+        if kind == "stop":
+            return
+        if kind == "ping":
+            conn.send(("pong", None))
+            continue
+        try:
+            conn.send(("ok", run_batch(qa_pipeline, payload)))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+
+
+class _Task:
+    __slots__ = ("item", "future", "attempts")
+
+    def __init__(self, item):
+        self.item = item
+        self.future = Future()
+        self.attempts = 0
+
+
+class InferenceWorkerPool:
+    """
+    Runs a model pipeline in several worker processes, so generations run in parallel
+    instead of taking turns on one interpreter's GIL.
+
+    With `share_weights` and the "fork" start method, the pipeline is loaded once in the
+    parent and inherited by every worker: the weight tensors are never written, so their
+    memory pages stay shared copy-on-write. Otherwise each worker loads its own copy.
+    Each worker pins its intra-op thread count so the workers together fit the cores.
+
+    `run_batch(pipeline, items)` must return one output per item. Each idle worker takes
+    the next queued request, plus any others already waiting (up to `max_batch_size`).
+    Idle workers are pinged every `health_interval` seconds, and a busy worker that takes
+    longer than `request_timeout` is treated as hung. A worker that crashes or hangs is
+    replaced, and the requests it was running are retried once, one at a time, so a
+    request that kills its worker fails alone instead of taking its batch with it.
+    """
+
+    def __init__(self, load_pipeline, run_batch, num_workers=2, threads_per_worker=None, max_batch_size=8,
+                 share_weights=True, warmup_item=None, health_interval=30, health_timeout=10,
+                 request_timeout=None, name="qa-worker"):
+        self.load_pipeline = load_pipeline
+        self.run_batch = run_batch
+        self.num_workers = max(1, num_workers)
+        self.threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // self.num_workers)
+        self.max_batch_size = max(1, max_batch_size)
+        self.warmup_item = warmup_item
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        self.request_timeout = request_timeout
+        self.name = name
+        start_methods = multiprocessing.get_all_start_methods()
+        self.share_weights = share_weights and "fork" in start_methods
+        self._context = multiprocessing.get_context("fork" if self.share_weights else "spawn")
+        self._pipeline = None
+        self._tasks = queue.Queue()
+        self._lock = threading.Lock()
+        self._workers = {}  # slot -> (process, connection)
+        self._threads = []
+        self._ready = {}  # slot -> threading.Event
+        self._closed = False
+        self._requests = 0
+        self._batches = 0
+        self._restarts = 0
+        self._busy_seconds = 0.0
+
+    @property
+    def ready(self):
+        """True once every worker has loaded and warmed up the model."""
+        return bool(self._ready) and all(event.is_set() for event in self._ready.values())
+
+    def wait_until_ready(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for event in self._ready.values():
+            remaining = None if deadline is None else max(0, deadline - time.monotonic())
+            if not event.wait(remaining):
+                return False
+        return True
+
+    def start(self):
+        """
+        Load the shared pipeline (when sharing weights) and fork the workers. Call this
+        early at startup, before other threads are running.
+        """
+        if self._threads:
+            return
+        if self.share_weights:
+            # No inference in the parent: the workers warm up after the fork
+            self._pipeline = self.load_pipeline()
+        for slot in range(self.num_workers):
+            self._ready[slot] = threading.Event()
+            self._workers[slot] = self._spawn()
+        for slot in range(self.num_workers):
+            thread = threading.Thread(target=self._serve, args=(slot,), name=f"{self.name}-{slot}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        print(f"Started {self.num_workers} {self.name} processes "
+              f"({self.threads_per_worker} threads each, {'shared' if self.share_weights else 'per-worker'} weights)")
+
+    def _spawn(self):
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(child_conn, self._pipeline, self.load_pipeline, self.run_batch,
+                  self.threads_per_worker, self.warmup_item),
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        return process, parent_conn
+
+    def _restart(self, slot, reason):
+        process, conn = self._workers[slot]
+        self._ready[slot].clear()
+        print(f"Restarting {self.name}-{slot} (pid {process.pid}): {reason}")
+        if process.is_alive():
+            process.kill()
+        process.join()
+        conn.close()
+        with self._lock:
+            self._restarts += 1
+        self._workers[slot] = self._spawn()
+        self._wait_ready(slot)
+
+    def _receive(self, slot, timeout=None):
+        """Wait for the worker's next message, noticing if it dies or runs past `timeout`."""
+        process, conn = self._workers[slot]
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not conn.poll(0.5):
+            if not process.is_alive():
+                raise EOFError(f"worker exited with code {process.exitcode}")
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError(f"no reply within {timeout} seconds")
+        return conn.recv()
+
+    def _wait_ready(self, slot):
+        """Block until the worker in `slot` has warmed up, replacing it if it dies on the way."""
+        while not self._closed:
+            try:
+                kind, _ = self._receive(slot)
+            except (EOFError, OSError) as e:
+                print(f"Error starting {self.name}-{slot}: {e}")
+                time.sleep(1)  # Avoid a tight crash loop, e.g. when the model cannot load
+                process, conn = self._workers[slot]
+                process.join()
+                conn.close()
+                with self._lock:
+                    self._restarts += 1
+                self._workers[slot] = self._spawn()
+                continue
+            if kind == "ready":
+                self._ready[slot].set()
+                return
+
+    def _check_health(self, slot):
+        try:
+            self._workers[slot][1].send(("ping", None))
+            kind, _ = self._receive(slot, self.health_timeout)
+            if kind != "pong":
+                raise RuntimeError(f"unexpected health check reply {kind!r}")
+        except Exception as e:
+            self._restart(slot, f"failed health check: {e}")
+
+    def _collect_batch(self, first):
+        batch = [first]
+        while len(batch) < self.max_batch_size:
+            try:
+                task = self._tasks.get_nowait()
+            except queue.Empty:
+                break
+            if task is None:
+                self._tasks.put(None)  # Leave the stop signal for the next get()
+                break
+            batch.append(task)
+        return batch
+
+    def _serve(self, slot):
+        self._wait_ready(slot)
+        while True:
+            try:
+                task = self._tasks.get(timeout=self.health_interval)
+            except queue.Empty:
+                self._check_health(slot)
+                continue
+            if task is None:
+                break
+
+            # Skip requests whose callers already gave up
+            batch = [task for task in self._collect_batch(task) if task.future.set_running_or_notify_cancel()]
+            retries = self._run(slot, batch) if batch else []
+            for task in retries:
+                self._run(slot, [task])
+
+        process, conn = self._workers[slot]
+        try:
+            conn.send(("stop", None))
+        except OSError:
+            pass
+        process.join(5)
+        if process.is_alive():
+            process.kill()
+
+    def _run(self, slot, batch):
+        """
+        Run a batch on the worker in `slot` and resolve its futures. If the worker crashes
+        or hangs, restart it and return the requests that should be retried.
+        """
+        started = time.perf_counter()
+        try:
+            self._workers[slot][1].send(("run", [task.item for task in batch]))
+            kind, payload = self._receive(slot, self.request_timeout)
+        except (EOFError, OSError, TimeoutError) as e:
+            reason = str(e) or "worker exited"
+            self._restart(slot, reason)
+            retries = []
+            for task in batch:
+                task.attempts += 1
+                if task.attempts > 1:
+                    task.future.set_exception(RuntimeError(f"{self.name} failed: {reason}"))
+                else:
+                    retries.append(task)
+            return retries
+
+        if kind == "ok" and len(payload) == len(batch):
+            for task, output in zip(batch, payload):
+                task.future.set_result(output)
+        else:
+            error = payload if kind == "error" else f"{len(payload)} outputs for {len(batch)} inputs"
+            for task in batch:
+                task.future.set_exception(RuntimeError(error))
+
+        with self._lock:
+            self._busy_seconds += time.perf_counter() - started
+            self._requests += len(batch)
+            self._batches += 1
+        return []
+
+    def submit(self, item):
+        """Queue an input and return a Future that resolves to its output."""
+        if self._closed:
+            raise RuntimeError(f"{self.name} pool is closed")
+        task = _Task(item)
+        self._tasks.put(task)
+        return task.future
+
+    def __call__(self, item, timeout=None):
+        """Submit an input and block until its output is ready."""
+        return self.submit(item).result(timeout)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.num_workers,
+                "ready_workers": sum(event.is_set() for event in self._ready.values()),
+                "threads_per_worker": self.threads_per_worker,
+                "shared_weights": self.share_weights,
+                "requests": self._requests,
+                "batches": self._batches,
+                "restarts": self._restarts,
+                "queue_depth": self._tasks.qsize(),
+                "busy_seconds": self._busy_seconds,
+            }
+
+    def close(self):
+        """Stop the workers after the requests already queued have been processed."""
+        self._closed = True
+        for _ in self._threads:
+            self._tasks.put(None)
+        for thread in self._threads:
+            thread.join()